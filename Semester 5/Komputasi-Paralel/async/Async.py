@@ -4,6 +4,12 @@ import pandas as pd
 from datetime import datetime
 import sys
 import os
+import time
+import csv
+import itertools
+import json
+import random
+import sqlite3
 
 
 API_KEY = "" 
@@ -17,15 +23,419 @@ INPUT_FILE = os.path.join(BASE_DIR, "data_kecamatan_jabar.xlsx")
 
 OUTPUT_FILE = os.path.join(BASE_DIR, "hasil_cuaca_jabar_lengkap.xlsx")
 
+# hasil mentah per baris ditambahkan ke sini begitu datang. Kalau proses mati, run berikutnya
+# melanjutkan file ini dan melewati baris yang sudah berhasil; setelah Excel tersimpan file ini
+# diarsipkan dengan nama bertanggal, jadi hasil run lama tidak pernah dihapus
+RESULTS_FILE = os.path.join(BASE_DIR, "hasil_cuaca_jabar.jsonl")
+
+# input dibaca streaming (xlsx lewat openpyxl read_only, atau csv); kolom ini yang dicari cuacanya
+LOCATION_COLUMN = 'Kecamatan'
+READ_BATCH_SIZE = 500
+
+# kolom yang diisi dari WeatherAPI, urut seperti di file hasil
+WEATHER_COLUMNS = ['Last Update (time)', 'Suhu (°C)', 'Kelembapan (%)', 'Kondisi Cuaca',
+                   'Kecepatan Angin (km/h)', 'Arah Angin (°)', 'Sinar UV']
+
+# endpoint current.json; bisa diarahkan ke server lain (mis. mock lokal) lewat environment variable
+WEATHER_API_URL = os.environ.get("WEATHER_API_URL", "http://api.weatherapi.com/v1/current.json")
+
+# mode bulk: lokasi dikirim BULK_SIZE sekaligus lewat POST current.json?q=bulk (paket berbayar WeatherAPI).
+# BULK_SIZE = 1 berarti satu GET per lokasi seperti biasa
+BULK_SIZE = int(os.environ.get("WEATHER_BULK_SIZE", "1"))
+# batch yang belum penuh tetap dikirim setelah menunggu sekian detik
+BULK_MAX_WAIT = 0.05
+
 MAX_CONCURRENT_REQUESTS = 50 
 
+# jumlah coroutine pekerja tetap dan kapasitas antrian baris; producer berhenti membaca
+# input saat antrian penuh, jadi memori tidak bergantung pada jumlah baris
+NUM_WORKERS = MAX_CONCURRENT_REQUESTS
+QUEUE_SIZE = 2 * NUM_WORKERS
+
+# batas bawah dan nilai awal konkurensi adaptif; limit mulai dari konkurensi penuh seperti
+# sebelum ada limiter, turun setengah saat kena 429/5xx/timeout lalu naik pelan saat API sehat
+MIN_CONCURRENT_REQUESTS = 4
+INITIAL_CONCURRENT_REQUESTS = MAX_CONCURRENT_REQUESTS
+
+# latensi yang dianggap sehat (detik); di atas 2x nilai ini limit diturunkan sedikit
+TARGET_LATENCY = 1.0
+
+# pengaturan koneksi: semua request ke host yang sama, jadi koneksi keep-alive dipakai ulang
+MAX_CONNECTIONS_PER_HOST = 50
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 30
+
+# retry untuk 429/5xx/timeout: jeda acak antara 0 dan min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2^percobaan)
+MAX_RETRIES = 4
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 10.0
+
+# batas laju global semua coroutine (token bucket): rata-rata RATE_LIMIT request/detik, burst RATE_BURST.
+# None mematikannya; isi sesuai kuota paket WeatherAPI kalau kuota per detik memang dibatasi,
+# selain itu limiter AIMD di atas sudah mundur sendiri saat API membalas 429
+RATE_LIMIT = None
+RATE_BURST = 20
+
+# cache hasil cuaca di disk; set CACHE_FILE = None untuk mematikan cache.
+# data dianggap kedaluwarsa CACHE_TTL detik setelah 'last_updated' dari API
+# (atau setelah waktu fetch kalau API tidak memberi waktu update), tapi paling cepat CACHE_MIN_TTL
+# detik setelah disimpan: stasiun yang jarang update tetap di-cache, tidak langsung kedaluwarsa
+CACHE_FILE = os.path.join(BASE_DIR, "cache_cuaca.sqlite")
+CACHE_TTL = 15 * 60
+CACHE_MIN_TTL = 5 * 60
+CACHE_MAX_ENTRIES = 10000
+
+
+class AdaptiveConcurrencyLimiter:
+    """Membatasi jumlah request bersamaan, limitnya disesuaikan dengan latensi dan error (AIMD)."""
+
+    def __init__(self, initial=INITIAL_CONCURRENT_REQUESTS, minimum=MIN_CONCURRENT_REQUESTS,
+                 maximum=MAX_CONCURRENT_REQUESTS, target_latency=TARGET_LATENCY):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, latency, throttled):
+        """Mencatat hasil satu request: throttled berarti 429, 5xx, atau error koneksi/timeout."""
+        now = time.monotonic()
+        if throttled:
+            # banyak request yang gagal bersamaan cukup menurunkan limit sekali
+            if now - self._last_decrease > self.target_latency:
+                self.limit = max(self.minimum, self.limit / 2)
+                self._last_decrease = now
+        elif latency > 2 * self.target_latency:
+            self.limit = max(self.minimum, self.limit * 0.9)
+        else:
+            # naik kira-kira 1 setiap satu "putaran" request yang sukses
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+class TokenBucket:
+    """Rate limiter token bucket yang dipakai bersama oleh semua coroutine."""
+
+    def __init__(self, rate=RATE_LIMIT, burst=RATE_BURST):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # lock membuat coroutine antre bergiliran, jadi token dibagi adil sesuai urutan datang
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class WeatherCache:
+    """Cache SQLite untuk hasil fetch_weather, dengan TTL dan eviction LRU (berdasarkan waktu akses)."""
+
+    def __init__(self, path=CACHE_FILE, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, min_ttl=CACHE_MIN_TTL):
+        self.ttl = ttl
+        self.min_ttl = min_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        cache_dir = os.path.dirname(path)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        # autocommit + WAL: tiap get/put satu transaksi kecil tanpa fsync penuh
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS weather ("
+            " location TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS weather_accessed ON weather (accessed_at)")
+
+    def get(self, location_name):
+        now = time.time()
+        row = self.conn.execute(
+            "SELECT data, expires_at FROM weather WHERE location = ?", (location_name,)
+        ).fetchone()
+        if row is None or row[1] <= now:
+            self.misses += 1
+            return None
+        self.conn.execute("UPDATE weather SET accessed_at = ? WHERE location = ?", (now, location_name))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, location_name, data, updated_epoch=None):
+        now = time.time()
+        expires_at = max((updated_epoch or now) + self.ttl, now + self.min_ttl)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO weather (location, data, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (location_name, json.dumps(data), expires_at, now),
+        )
+        self.conn.execute(
+            "DELETE FROM weather WHERE location IN ("
+            " SELECT location FROM weather ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def close(self):
+        self.conn.close()
+
+
+def iter_input_batches(path, column=LOCATION_COLUMN, batch_size=READ_BATCH_SIZE):
+    """Membaca file xlsx/csv secara streaming, per batch berisi (index, lokasi, baris).
+
+    index adalah nomor baris data (0 = baris pertama setelah header) dan baris adalah dict
+    semua kolom input, supaya kolom lain ikut ke file hasil. Baris yang sel lokasinya kosong
+    tetap dikirim dengan lokasi "" (nanti ditandai gagal); hanya baris yang seluruhnya kosong dilewati.
+    """
+    if path.lower().endswith(".csv"):
+        f = open(path, newline="", encoding="utf-8-sig")
+        rows = csv.reader(f)
+        close = f.close
+    else:
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        rows = workbook.active.iter_rows(values_only=True)
+        close = workbook.close
+
+    try:
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [name if name not in (None, "") else f"Unnamed: {i}" for i, name in enumerate(header)]
+        if column not in header:
+            raise ValueError(f"Kolom '{column}' tidak ada di {path}")
+        position = header.index(column)
+
+        batch = []
+        for index, row in enumerate(rows):
+            if all(value is None or str(value).strip() == "" for value in row):
+                continue
+            value = row[position] if position < len(row) else None
+            kecamatan = "" if value is None else str(value).strip()
+            batch.append((index, kecamatan, dict(zip(header, row))))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        close()
+
+
+class ResultSink:
+    """Menambahkan hasil per baris ke file JSONL (append-only) sesuai urutan selesainya request."""
+
+    def __init__(self, path=RESULTS_FILE):
+        self.path = path
+        # baris yang sudah berhasil di run yang terputus sebelumnya: index -> lokasi
+        self.done = {}
+        results_dir = os.path.dirname(path)
+        if results_dir and not os.path.exists(results_dir):
+            os.makedirs(results_dir)
+        if os.path.exists(path):
+            self._load_existing()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _load_existing(self):
+        with open(self.path, "rb") as f:
+            content = f.read()
+        # baris terakhir bisa setengah tertulis kalau proses mati saat menulis; buang sisanya
+        end = content.rfind(b"\n") + 1
+        if end < len(content):
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        for line in content[:end].splitlines():
+            record = json.loads(line)
+            if record['Berhasil']:
+                self.done[record['index']] = str(record[LOCATION_COLUMN]).strip()
+            else:
+                self.done.pop(record['index'], None)
+        if self.done:
+            print(f"Melanjutkan {self.path}: {len(self.done)} baris sudah berhasil dan dilewati")
+
+    def is_done(self, index, kecamatan):
+        return self.done.get(index) == kecamatan
+
+    def write(self, index, kecamatan, row, location_name, data):
+        # kolom cuaca lama di input (mis. input berupa hasil run sebelumnya) tidak ikut disalin
+        record = {'index': index}
+        record.update((k, v) for k, v in row.items() if k not in WEATHER_COLUMNS)
+        record.update({'Lokasi Query': location_name, 'Berhasil': data is not None})
+        if data is not None:
+            record.update(data)
+        # default=str untuk sel tanggal/waktu dari Excel
+        self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def to_frame(self):
+        """Membaca ulang seluruh hasil sebagai DataFrame ber-index nomor baris input.
+
+        Baris yang tercatat lebih dari sekali (gagal lalu dicoba lagi di run lanjutan) memakai catatan terakhir.
+        """
+        if os.path.getsize(self.path) == 0:
+            return pd.DataFrame(columns=[LOCATION_COLUMN, 'Lokasi Query', 'Berhasil'])
+        results = pd.read_json(self.path, lines=True, convert_dates=False, dtype=False)
+        return results.drop_duplicates('index', keep='last').set_index('index').sort_index()
+
+    def archive(self):
+        """Memindahkan file hasil run yang sudah selesai ke nama bertanggal supaya run berikutnya mulai baru."""
+        base, ext = os.path.splitext(self.path)
+        archived = f"{base}_{datetime.now():%Y%m%d_%H%M%S}{ext}"
+        os.replace(self.path, archived)
+        return archived
+
 
 class WeatherService:
     """Menangani komunikasi dengan WeatherAPI.com"""
     
-    BASE_URL = "http://api.weatherapi.com/v1/current.json"
+    BASE_URL = WEATHER_API_URL
+
+    def __init__(self, cache=None, bulk_size=BULK_SIZE):
+        self.limiter = AdaptiveConcurrencyLimiter()
+        self.rate_limiter = TokenBucket() if RATE_LIMIT else None
+        self.cache = cache
+        self.bulk_size = bulk_size
+        self.retries = 0
+        self.coalesced = 0
+        self.bulk_requests = 0
+        self.bulk_fallbacks = 0
+        # request yang sedang berjalan per lokasi; pemanggil lain untuk lokasi yang sama ikut menunggu.
+        # entri dihapus begitu task selesai, lookup berikutnya dilayani WeatherCache
+        self._in_flight = {}
+        # lokasi yang menunggu dikirim dalam satu request bulk: (lokasi, future)
+        self._bulk_pending = []
+        self._bulk_timer = None
+        self._bulk_tasks = set()
 
     async def fetch_weather(self, session, location_name):
+        if self.cache is not None:
+            cached = self.cache.get(location_name)
+            if cached is not None:
+                return cached
+
+        task = self._in_flight.get(location_name)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_uncached(session, location_name))
+            self._in_flight[location_name] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(location_name, None))
+        else:
+            self.coalesced += 1
+        # shield: kalau satu pemanggil dibatalkan, request bersama tetap jalan untuk pemanggil lain
+        return await asyncio.shield(task)
+
+    async def _fetch_uncached(self, session, location_name):
+        if self.bulk_size > 1:
+            result, updated_epoch = await self._fetch_via_bulk(session, location_name)
+        else:
+            result, updated_epoch = await self._fetch_single(session, location_name)
+
+        if result is not None and self.cache is not None:
+            self.cache.put(location_name, result, updated_epoch)
+        return result
+
+    async def _with_retries(self, request):
+        """Menjalankan request() -> (hasil, throttled) dengan limiter, rate limit, dan retry."""
+        for attempt in range(MAX_RETRIES + 1):
+            async with self.limiter:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire()
+                started = time.monotonic()
+                result, throttled = await request()
+                self.limiter.record(time.monotonic() - started, throttled)
+
+            # hanya kegagalan sementara (429/5xx/timeout) yang diulang; 400 berarti lokasi memang tidak ada
+            if not throttled or attempt == MAX_RETRIES:
+                return result
+            self.retries += 1
+            # jeda di luar limiter supaya slot konkurensinya bisa dipakai request lain
+            await asyncio.sleep(random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt)))
+
+    async def _fetch_single(self, session, location_name):
+        return await self._with_retries(lambda: self._request_weather(session, location_name))
+
+    async def _fetch_via_bulk(self, session, location_name):
+        # lokasi dikumpulkan sampai bulk_size atau BULK_MAX_WAIT detik, lalu dikirim dalam satu POST
+        future = asyncio.get_running_loop().create_future()
+        self._bulk_pending.append((location_name, future))
+        if len(self._bulk_pending) >= self.bulk_size:
+            self._flush_bulk(session)
+        elif self._bulk_timer is None:
+            self._bulk_timer = asyncio.get_running_loop().call_later(BULK_MAX_WAIT, self._flush_bulk, session)
+        return await future
+
+    def _flush_bulk(self, session):
+        if self._bulk_timer is not None:
+            self._bulk_timer.cancel()
+            self._bulk_timer = None
+        batch, self._bulk_pending = self._bulk_pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send_bulk(session, batch))
+            self._bulk_tasks.add(task)
+            task.add_done_callback(self._bulk_tasks.discard)
+
+    async def _send_bulk(self, session, batch):
+        try:
+            locations = [location_name for location_name, _ in batch]
+            self.bulk_requests += 1
+            found = await self._with_retries(lambda: self._request_bulk(session, locations)) or {}
+
+            # lokasi yang tidak ada di jawaban bulk (atau bulk-nya gagal) diambil satu per satu
+            missing = [location_name for location_name in locations if location_name not in found]
+            if missing:
+                self.bulk_fallbacks += len(missing)
+                singles = await asyncio.gather(*(self._fetch_single(session, m) for m in missing))
+                found.update(zip(missing, singles))
+
+            for location_name, future in batch:
+                if not future.done():
+                    future.set_result(found[location_name])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    @staticmethod
+    def _parse_current(current):
+        """Mengembalikan (data cuaca, epoch last_updated) dari objek 'current' WeatherAPI."""
+        return {
+            'Last Update (time)': current.get('last_updated'),
+            'Suhu (°C)': current.get('temp_c'),
+            'Kelembapan (%)': current.get('humidity'),
+            'Kondisi Cuaca': current.get('condition', {}).get('text'),
+            'Kecepatan Angin (km/h)': current.get('wind_kph'),
+            'Arah Angin (°)': current.get('wind_degree'),
+            'Sinar UV': current.get('uv')
+        }, current.get('last_updated_epoch')
+
+    async def _request_weather(self, session, location_name):
+        """Mengembalikan ((data cuaca atau None, epoch last_updated), apakah request ini tanda API kewalahan)."""
         try:
             params = {
                 'key': API_KEY,
@@ -36,46 +446,97 @@ class WeatherService:
             async with session.get(self.BASE_URL, params=params) as response:
                 if response.status == 200:
                     data = await response.json()
-                    current = data.get('current', {})
-                    
-                    return {
-                        'Last Update (time)': current.get('last_updated'),
-                        'Suhu (°C)': current.get('temp_c'),
-                        'Kelembapan (%)': current.get('humidity'),
-                        'Kondisi Cuaca': current.get('condition', {}).get('text'),
-                        'Kecepatan Angin (km/h)': current.get('wind_kph'),
-                        'Arah Angin (°)': current.get('wind_degree'),
-                        'Sinar UV': current.get('uv')
-                    }
+                    return self._parse_current(data.get('current', {})), False
                 elif response.status == 400:
                     print(f"   [x] Lokasi tidak ditemukan API: {location_name}")
-                    return None
+                    return (None, None), False
                 else:
                     print(f"   [!] Error Status {response.status} untuk: {location_name}")
-                    return None
+                    return (None, None), response.status == 429 or response.status >= 500
 
         except Exception as e:
             print(f"   [!] Error koneksi: {e}")
-            return None
+            return (None, None), True
 
-class WeatherProcessManager:
-    def __init__(self):
-        self.weather_service = WeatherService()
+    async def _request_bulk(self, session, locations):
+        """Satu POST bulk; mengembalikan ({lokasi: (data, epoch)} atau None, throttled).
 
-        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        Lokasi yang error di dalam jawaban bulk tidak dimasukkan ke dict, supaya dicoba ulang satu per satu.
+        """
+        try:
+            params = {'key': API_KEY, 'q': 'bulk', 'aqi': 'no'}
+            body = {'locations': [{'q': location_name, 'custom_id': str(i)}
+                                  for i, location_name in enumerate(locations)]}
+
+            async with session.post(self.BASE_URL, params=params, json=body) as response:
+                if response.status != 200:
+                    print(f"   [!] Error Status {response.status} untuk request bulk ({len(locations)} lokasi)")
+                    return None, response.status == 429 or response.status >= 500
+                data = await response.json()
+
+            found = {}
+            for item in data.get('bulk', []):
+                query = item.get('query', {})
+                custom_id = query.get('custom_id')
+                if 'current' in query and custom_id is not None and custom_id.isdigit() \
+                        and int(custom_id) < len(locations):
+                    found[locations[int(custom_id)]] = self._parse_current(query['current'])
+            return found, False
+
+        except Exception as e:
+            print(f"   [!] Error koneksi (bulk): {e}")
+            return None, True
 
-    async def process_row(self, session, index, row):
+class WeatherProcessManager:
+    def __init__(self, cache_file=CACHE_FILE):
+        # batas konkurensi sekarang diatur adaptif di dalam WeatherService
+        self.cache = WeatherCache(cache_file) if cache_file else None
+        self.weather_service = WeatherService(self.cache)
+        self.duplicate_rows = 0
 
-        async with self.semaphore:
-            kecamatan = row['Kecamatan']
+    @staticmethod
+    def build_query(kecamatan):
+        return f"{kecamatan}, Indonesia"
 
-            query_location = f"{kecamatan}, Indonesia" 
+    async def process_location(self, session, query_location, rows):
+        """Mengambil cuaca satu query sekali saja lalu membagikannya ke semua baris (index, kecamatan, baris)-nya.
 
+        query_location None berarti sel lokasinya kosong: tidak ada request dan barisnya dicatat gagal.
+        """
+        for index, kecamatan, _ in rows:
             if index % 50 == 0:
                 print(f"-> Memproses baris ke-{index}: {kecamatan}...")
-            
+
+        weather_data = None
+        if query_location is not None:
             weather_data = await self.weather_service.fetch_weather(session, query_location)
-            return index, weather_data
+        return [(index, kecamatan, row, query_location, weather_data) for index, kecamatan, row in rows]
+
+    async def _produce(self, batches, queue, sink):
+        try:
+            for batch in batches:
+                # baris dengan query sama di satu batch digabung jadi satu item antrian;
+                # duplikat antar batch ditangani coalescing dan cache di WeatherService
+                batch = [item for item in batch if not sink.is_done(item[0], item[1])]
+                grouped = {}
+                for index, kecamatan, row in batch:
+                    query = self.build_query(kecamatan) if kecamatan else None
+                    grouped.setdefault(query, []).append((index, kecamatan, row))
+                self.duplicate_rows += len(batch) - len(grouped)
+                for item in grouped.items():
+                    await queue.put(item)
+        finally:
+            # satu tanda berhenti untuk tiap pekerja
+            for _ in range(NUM_WORKERS):
+                await queue.put(None)
+
+    async def _consume(self, session, queue, sink):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            for result in await self.process_location(session, *item):
+                sink.write(*result)
 
     async def run(self):
 
@@ -86,37 +547,61 @@ class WeatherProcessManager:
             return
 
         try:
-            df = pd.read_excel(INPUT_FILE)
-            print(f"Berhasil membaca file input: {INPUT_FILE}")
+            batches = iter_input_batches(INPUT_FILE)
+            # batch pertama dibaca di sini supaya file yang rusak/kolom yang salah langsung ketahuan
+            batches = itertools.chain([next(batches, [])], batches)
+            print(f"Berhasil membuka file input: {INPUT_FILE}")
         except Exception as e:
-            print(f"Gagal membaca Excel: {e}")
+            print(f"Gagal membaca file input: {e}")
             return
 
-        total_data = len(df)
-        print(f"--- Memulai Proses Asyncio untuk {total_data} kecamatan ---")
-        
+        print(f"--- Memulai Proses Asyncio ({NUM_WORKERS} pekerja, antrian {QUEUE_SIZE} baris) ---")
 
-        connector = aiohttp.TCPConnector(ssl=False)
+        connector = aiohttp.TCPConnector(
+            ssl=False,
+            limit=MAX_CONCURRENT_REQUESTS,
+            limit_per_host=MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+        )
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
 
-        async with aiohttp.ClientSession(connector=connector) as session:
-            tasks = []
-            for index, row in df.iterrows():
-                task = asyncio.create_task(self.process_row(session, index, row))
-                tasks.append(task)
-            
-            results = await asyncio.gather(*tasks)
+        sink = ResultSink(RESULTS_FILE)
+        try:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+                queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+                tasks = [asyncio.create_task(self._produce(batches, queue, sink))]
+                tasks += [asyncio.create_task(self._consume(session, queue, sink)) for _ in range(NUM_WORKERS)]
+                try:
+                    await asyncio.gather(*tasks)
+                finally:
+                    # kalau satu task gagal, yang lain jangan dibiarkan menunggu antrian selamanya
+                    for task in tasks:
+                        task.cancel()
+        finally:
+            sink.close()
+
+        limiter = self.weather_service.limiter
+        print(f"Konkurensi adaptif akhir: {int(limiter.limit)} request bersamaan")
+        print(f"Request diulang: {self.weather_service.retries}")
+        if self.weather_service.bulk_size > 1:
+            print(f"Request bulk: {self.weather_service.bulk_requests}, "
+                  f"lokasi fallback per lokasi: {self.weather_service.bulk_fallbacks}")
+        print(f"Baris duplikat digabung: {self.duplicate_rows}, request digabung saat berjalan: "
+              f"{self.weather_service.coalesced}")
+        if self.cache is not None:
+            print(f"Cache: {self.cache.hits} hit, {self.cache.misses} miss")
+            self.cache.close()
 
         print("\n--- Menyusun Data ke Excel ---")
-        success_count = 0
-        
-        for index, data in results:
-            if data:
-                success_count += 1
-                for key, value in data.items():
-                    df.at[index, key] = value
-            else:
-                df.at[index, 'Kondisi Cuaca'] = "Gagal / Tidak Ditemukan"
+        results = sink.to_frame()
+        success_count = int(results['Berhasil'].astype(bool).sum())
+        total_data = len(results)
 
+        results.loc[~results['Berhasil'].astype(bool), 'Kondisi Cuaca'] = "Gagal / Tidak Ditemukan"
+        df = results.drop(columns=['Lokasi Query', 'Berhasil'])
+        # kolom cuaca selalu di belakang kolom input, walaupun baris pertama di file hasil gagal
+        df = df[[c for c in df.columns if c not in WEATHER_COLUMNS] + [c for c in WEATHER_COLUMNS if c in df.columns]]
 
         try:
 
@@ -127,6 +612,7 @@ class WeatherProcessManager:
             df.to_excel(OUTPUT_FILE, index=False)
             print(f"\n[SELESAI] Sukses mendapatkan data: {success_count} dari {total_data}")
             print(f"File hasil disimpan di: {OUTPUT_FILE}")
+            print(f"Hasil mentah diarsipkan di: {sink.archive()}")
         except PermissionError:
             print(f"\n[ERROR] Gagal menyimpan file! Pastikan file '{OUTPUT_FILE}' sedang TIDAK DIBUKA di Excel.")
 
@@ -1,8 +1,12 @@
+import argparse
 import asyncio
 import aiohttp
 import pandas as pd
+import hashlib
+import json
 import sys
 import os
+import time
 
 
 FOLDER_PATH = r"D:/New folder/Code-for-College/Komputasi-Paralel/async"
@@ -11,80 +15,169 @@ FILE_NAME = "data_kecamatan_jabar.xlsx"
 
 OUTPUT_FILE = os.path.join(FOLDER_PATH, FILE_NAME)
 
-BASE_URL = "https://www.emsifa.com/api-wilayah-indonesia/api"
-TARGET_PROVINSI = "JAWA BARAT"
-
-async def fetch_json(session, url):
-    """Fungsi helper untuk mengambil data JSON dari URL"""
-    try:
-        async with session.get(url) as response:
-            if response.status == 200:
-                return await response.json()
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-    return []
-
-async def get_districts_from_regency(session, regency):
-    """Mengambil daftar kecamatan dari satu kabupaten/kota"""
-    regency_id = regency['id']
-    regency_name = regency['name']
-    
-    url = f"{BASE_URL}/districts/{regency_id}.json"
-    districts = await fetch_json(session, url)
-    
-    results = []
-    for d in districts:
-        district_name = d['name']
-        full_name = f"Kecamatan {district_name}, {regency_name}"
-        results.append({'Kecamatan': full_name})
-    return results
-
-async def main():
-    print(f"--- Memulai Pengambilan Data Kecamatan untuk: {TARGET_PROVINSI} ---")
-
-
-    connector = aiohttp.TCPConnector(ssl=False)
-    
+BASE_URL = os.environ.get("WILAYAH_API_URL", "https://www.emsifa.com/api-wilayah-indonesia/api")
+TARGET_PROVINSI = ["JAWA BARAT"]
+
+# urutan level di API; tiap level diambil dari /<level>/<id induk>.json (provinsi dari /provinces.json)
+LEVELS = ["provinces", "regencies", "districts", "villages"]
+LEVEL_SAMPAI = {"kecamatan": 2, "desa": 3}
+
+MAX_CONCURRENT_REQUESTS = 20
+
+# tiap respons disimpan per URL di folder ini. Run yang terputus bisa dilanjutkan karena URL yang
+# sudah ada di cache tidak diminta lagi. Setelah CACHE_TTL detik, respons dicek ulang ke server
+# dengan ETag/Last-Modified (304 berarti data di cache masih dipakai)
+CACHE_DIR = os.path.join(FOLDER_PATH, "cache_wilayah")
+CACHE_TTL = 7 * 24 * 60 * 60
+
+
+class ResponseCache:
+    """Cache respons JSON di disk, satu file per URL (nama file = hash URL)."""
+
+    def __init__(self, folder=CACHE_DIR, ttl=CACHE_TTL):
+        self.folder = folder
+        self.ttl = ttl
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.folder, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".json")
+
+    def load(self, url):
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def save(self, url, data, etag=None, last_modified=None):
+        entry = {'url': url, 'fetched_at': time.time(), 'etag': etag,
+                 'last_modified': last_modified, 'data': data}
+        # tulis ke file sementara dulu supaya file cache tidak pernah setengah jadi kalau proses mati
+        path = self._path(url)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+
+class RegionCrawler:
+    """Mengambil pohon wilayah provinsi -> kabupaten/kota -> kecamatan -> desa secara concurrent."""
+
+    def __init__(self, session, cache, refresh=False):
+        self.session = session
+        self.cache = cache
+        self.refresh = refresh
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.stats = {'cache': 0, 'tidak berubah': 0, 'diunduh': 0, 'gagal': 0}
+
+    async def fetch_json(self, url):
+        """Fungsi helper untuk mengambil data JSON dari URL (lewat cache)"""
+        entry = self.cache.load(url)
+        if entry is not None and not self.refresh and self.cache.is_fresh(entry):
+            self.stats['cache'] += 1
+            return entry['data']
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            async with self.semaphore:
+                async with self.session.get(url, headers=headers) as response:
+                    if response.status == 304 and entry is not None:
+                        self.cache.save(url, entry['data'], entry.get('etag'), entry.get('last_modified'))
+                        self.stats['tidak berubah'] += 1
+                        return entry['data']
+                    if response.status == 200:
+                        data = await response.json(content_type=None)
+                        self.cache.save(url, data, response.headers.get('ETag'),
+                                        response.headers.get('Last-Modified'))
+                        self.stats['diunduh'] += 1
+                        return data
+                    print(f"Error fetching {url}: status {response.status}")
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+
+        self.stats['gagal'] += 1
+        # data lama masih lebih baik daripada kosong; kalau tidak ada, URL ini diambil lagi di run berikutnya
+        return entry['data'] if entry is not None else []
+
+    async def crawl(self, parents, depth, max_depth):
+        """Mengembalikan semua jalur [provinsi, kabupaten, ...] sampai level max_depth di bawah parents[-1]."""
+        children = await self.fetch_json(f"{BASE_URL}/{LEVELS[depth]}/{parents[-1]['id']}.json")
+        if depth == max_depth:
+            return [parents + [child] for child in children]
+        results = await asyncio.gather(*(self.crawl(parents + [child], depth + 1, max_depth)
+                                         for child in children))
+        return [path for paths in results for path in paths]
+
+
+def path_to_row(path):
+    province, regency, district = path[0], path[1], path[2]
+    row = {
+        'Kecamatan': f"Kecamatan {district['name']}, {regency['name']}",
+        'Provinsi': province['name'],
+        'Kabupaten/Kota': regency['name'],
+    }
+    if len(path) > 3:
+        row['Desa'] = path[3]['name']
+    return row
+
+
+async def main(target_provinsi=TARGET_PROVINSI, sampai="kecamatan", refresh=False, output_file=OUTPUT_FILE):
+    semua = not target_provinsi
+    print(f"--- Memulai Pengambilan Data Wilayah untuk: {'SEMUA PROVINSI' if semua else ', '.join(target_provinsi)} "
+          f"(sampai {sampai}) ---")
+
+
+    connector = aiohttp.TCPConnector(ssl=False, limit=MAX_CONCURRENT_REQUESTS)
+
     async with aiohttp.ClientSession(connector=connector) as session:
+        crawler = RegionCrawler(session, ResponseCache(), refresh)
+
         print("1. Mencari Provinsi...")
-        provinces = await fetch_json(session, f"{BASE_URL}/provinces.json")
-        jabar = next((p for p in provinces if p['name'] == TARGET_PROVINSI), None)
-        
-        if not jabar:
-            print(f"[!] Provinsi '{TARGET_PROVINSI}' tidak ditemukan di API.")
+        provinces = await crawler.fetch_json(f"{BASE_URL}/provinces.json")
+        if not semua:
+            wanted = {name.upper() for name in target_provinsi}
+            provinces = [p for p in provinces if p['name'] in wanted]
+            missing = wanted - {p['name'] for p in provinces}
+            for name in sorted(missing):
+                print(f"[!] Provinsi '{name}' tidak ditemukan di API.")
+        if not provinces:
             return
-            
-        print(f"   -> Ditemukan: {jabar['name']} (ID: {jabar['id']})")
-
-        print(f"2. Mengambil Kabupaten/Kota di {jabar['name']}...")
-        url_regencies = f"{BASE_URL}/regencies/{jabar['id']}.json"
-        regencies = await fetch_json(session, url_regencies)
-        print(f"   -> Ditemukan {len(regencies)} Kabupaten/Kota.")
-
-        print("3. Mengambil Kecamatan...")
-        tasks = [get_districts_from_regency(session, reg) for reg in regencies]
-        regency_results = await asyncio.gather(*tasks)
-        
-        all_kecamatan_data = []
-        for res in regency_results:
-            all_kecamatan_data.extend(res)
-
-    print(f"\nTotal Kecamatan didapatkan: {len(all_kecamatan_data)}")
-    print(f"Menyimpan ke: {OUTPUT_FILE}")
-    
-    if len(all_kecamatan_data) > 0:
-
-        if not os.path.exists(FOLDER_PATH):
+
+        for p in provinces:
+            print(f"   -> Ditemukan: {p['name']} (ID: {p['id']})")
+
+        print(f"2. Mengambil Kabupaten/Kota sampai {sampai.capitalize()}...")
+        results = await asyncio.gather(*(crawler.crawl([p], 1, LEVEL_SAMPAI[sampai]) for p in provinces))
+        all_data = [path_to_row(path) for paths in results for path in paths]
+
+    print("   -> Request: " + ", ".join(f"{v} {k}" for k, v in crawler.stats.items()))
+    if crawler.stats['gagal']:
+        print("   [!] Sebagian URL gagal diambil; jalankan lagi untuk melanjutkan dari cache.")
+    print(f"\nTotal {sampai.capitalize()} didapatkan: {len(all_data)}")
+    print(f"Menyimpan ke: {output_file}")
+
+    if len(all_data) > 0:
+
+        output_dir = os.path.dirname(output_file)
+        if output_dir and not os.path.exists(output_dir):
             try:
-                os.makedirs(FOLDER_PATH)
-                print(f"   (Folder dibuat otomatis: {FOLDER_PATH})")
+                os.makedirs(output_dir)
+                print(f"   (Folder dibuat otomatis: {output_dir})")
             except Exception as e:
                 print(f"   [!] Gagal membuat folder: {e}")
                 return
 
         try:
-            df = pd.DataFrame(all_kecamatan_data)
-            df.to_excel(OUTPUT_FILE, index=False)
+            df = pd.DataFrame(all_data)
+            df.to_excel(output_file, index=False)
             print("Selesai! File berhasil disimpan.")
         except Exception as e:
             print(f"Error saat menyimpan file Excel: {e}")
@@ -92,6 +185,21 @@ async def main():
         print("Gagal mendapatkan data (kosong). Cek koneksi internet.")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ambil data wilayah Indonesia (provinsi sampai desa)")
+    parser.add_argument("--provinsi", action="append",
+                        help=f"nama provinsi, boleh diulang; 'SEMUA' untuk seluruh Indonesia "
+                             f"(default: {', '.join(TARGET_PROVINSI)})")
+    parser.add_argument("--sampai", choices=sorted(LEVEL_SAMPAI), default="kecamatan",
+                        help="level terdalam yang diambil")
+    parser.add_argument("--refresh", action="store_true",
+                        help="cek ulang semua URL ke server walaupun cache belum kedaluwarsa")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="file Excel hasil")
+    args = parser.parse_args()
+
+    target = args.provinsi or TARGET_PROVINSI
+    if any(name.upper() == "SEMUA" for name in target):
+        target = []
+
     if sys.platform == 'win32':
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main(target, args.sampai, args.refresh, args.output))
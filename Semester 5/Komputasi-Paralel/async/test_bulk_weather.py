@@ -0,0 +1,131 @@
+"""Uji mode bulk WeatherService terhadap server WeatherAPI tiruan (aiohttp) di localhost.
+
+Jalankan dari folder ini: python -m unittest test_bulk_weather
+"""
+import asyncio
+import random
+import unittest
+from unittest import mock
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import Async
+
+
+def current_for(q):
+    # suhu dibuat unik per lokasi supaya hasil yang tertukar antar lokasi langsung ketahuan
+    return {
+        'last_updated_epoch': 1700000000,
+        'last_updated': '2023-11-14 22:13',
+        'temp_c': float(sum(map(ord, q)) % 40),
+        'humidity': 80,
+        'condition': {'text': f"Cuaca {q}"},
+        'wind_kph': 5.0,
+        'wind_degree': 90,
+        'uv': 3.0,
+    }
+
+
+class MockWeatherAPI:
+    """current.json tiruan: GET satu lokasi dan POST ?q=bulk, dengan mode gagal yang bisa diatur."""
+
+    def __init__(self, bulk_status=200, unknown=()):
+        self.bulk_status = bulk_status
+        self.unknown = set(unknown)
+        self.gets = []
+        self.bulk_batches = []
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/v1/current.json", self.handle_get)
+        app.router.add_post("/v1/current.json", self.handle_bulk)
+        return app
+
+    async def handle_get(self, request):
+        q = request.query['q']
+        self.gets.append(q)
+        if q in self.unknown:
+            return web.json_response({'error': {'code': 1006, 'message': 'No matching location found.'}},
+                                     status=400)
+        return web.json_response({'location': {'name': q}, 'current': current_for(q)})
+
+    async def handle_bulk(self, request):
+        assert request.query['q'] == 'bulk'
+        body = await request.json()
+        self.bulk_batches.append([item['q'] for item in body['locations']])
+        if self.bulk_status != 200:
+            return web.Response(status=self.bulk_status)
+        items = []
+        for item in body['locations']:
+            query = {'custom_id': item['custom_id'], 'q': item['q']}
+            if item['q'] in self.unknown:
+                query['error'] = {'code': 1006, 'message': 'No matching location found.'}
+            else:
+                query.update({'location': {'name': item['q']}, 'current': current_for(item['q'])})
+            items.append({'query': query})
+        # urutan jawaban diacak: hasil harus dicocokkan lewat custom_id, bukan posisi
+        random.shuffle(items)
+        return web.json_response({'bulk': items})
+
+
+class BulkWeatherTest(unittest.IsolatedAsyncioTestCase):
+    LOCATIONS = [f"Kecamatan {i}, Indonesia" for i in range(7)]
+
+    async def fetch_all(self, api, bulk_size=3):
+        server = TestServer(api.app())
+        await server.start_server()
+        try:
+            service = Async.WeatherService(bulk_size=bulk_size)
+            service.BASE_URL = str(server.make_url("/v1/current.json"))
+            async with aiohttp.ClientSession() as session:
+                results = await asyncio.gather(*(service.fetch_weather(session, q) for q in self.LOCATIONS))
+            return service, results
+        finally:
+            await server.close()
+
+    def assert_weather(self, location, result):
+        self.assertIsNotNone(result, location)
+        self.assertEqual(result['Suhu (°C)'], current_for(location)['temp_c'])
+        self.assertEqual(result['Kondisi Cuaca'], f"Cuaca {location}")
+
+    async def test_bulk_batches_and_matches_by_custom_id(self):
+        api = MockWeatherAPI()
+        service, results = await self.fetch_all(api, bulk_size=3)
+
+        self.assertEqual(sorted(len(b) for b in api.bulk_batches), [1, 3, 3])
+        self.assertEqual(sorted(q for b in api.bulk_batches for q in b), sorted(self.LOCATIONS))
+        self.assertEqual(api.gets, [])
+        self.assertEqual(service.bulk_fallbacks, 0)
+        for location, result in zip(self.LOCATIONS, results):
+            self.assert_weather(location, result)
+
+    async def test_bulk_503_falls_back_to_get(self):
+        api = MockWeatherAPI(bulk_status=503)
+        with mock.patch.object(Async, 'MAX_RETRIES', 0):
+            service, results = await self.fetch_all(api, bulk_size=3)
+
+        self.assertEqual(len(api.bulk_batches), 3)
+        self.assertEqual(sorted(api.gets), sorted(self.LOCATIONS))
+        self.assertEqual(service.bulk_fallbacks, len(self.LOCATIONS))
+        for location, result in zip(self.LOCATIONS, results):
+            self.assert_weather(location, result)
+
+    async def test_per_location_error_in_bulk_response(self):
+        unknown = self.LOCATIONS[4]
+        api = MockWeatherAPI(unknown=[unknown])
+        service, results = await self.fetch_all(api, bulk_size=3)
+
+        # hanya lokasi yang error di jawaban bulk yang dicoba lagi lewat GET, lalu 400 -> None
+        self.assertEqual(api.gets, [unknown])
+        self.assertEqual(service.bulk_fallbacks, 1)
+        for location, result in zip(self.LOCATIONS, results):
+            if location == unknown:
+                self.assertIsNone(result)
+            else:
+                self.assert_weather(location, result)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from paralelVSserial import (
+    penghitung_kata_serial,
+    penghitung_kata_parallel,
+    penghitung_kata_parallel_file,
+)
+
+
+def buat_korpus(ukuran_mb, kosakata, non_ascii=0.0, seed=0):
+    """Membuat teks sintetis sekitar ukuran_mb MB dengan distribusi kata Zipf atas kosakata kata.
+
+    non_ascii adalah proporsi kata di kosakata yang diberi satu huruf beraksen.
+    """
+    rng = random.Random(seed)
+    huruf = "abcdefghijklmnopqrstuvwxyz"
+    aksen = "éèäöüñçğışâ"
+    kata = set()
+    while len(kata) < kosakata:
+        w = "".join(rng.choice(huruf) for _ in range(rng.randint(2, 12)))
+        if rng.random() < non_ascii:
+            i = rng.randrange(len(w))
+            w = w[:i] + rng.choice(aksen) + w[i + 1:]
+        kata.add(w)
+    kata = sorted(kata)
+    bobot = [1 / r for r in range(1, kosakata + 1)]
+    target = int(ukuran_mb * 1024 * 1024)
+    bagian, panjang = [], 0
+    while panjang < target:
+        baris = " ".join(rng.choices(kata, bobot, k=1000)) + ".\n"
+        bagian.append(baris)
+        panjang += len(baris)
+    return "".join(bagian)
+
+
+def ukur(fungsi, pemanasan, ulang):
+    """Menjalankan fungsi beberapa kali dan mengembalikan daftar waktu (perf_counter) per ulangan."""
+    for _ in range(pemanasan):
+        fungsi()
+    waktu = []
+    for _ in range(ulang):
+        t0 = time.perf_counter()
+        fungsi()
+        waktu.append(time.perf_counter() - t0)
+    return waktu
+
+
+def ringkas(waktu, ukuran_byte):
+    median = statistics.median(waktu)
+    if len(waktu) >= 2:
+        q1, _, q3 = statistics.quantiles(waktu, n=4, method="inclusive")
+    else:
+        q1 = q3 = median
+    return {
+        "median_detik": median,
+        "iqr_detik": q3 - q1,
+        "min_detik": min(waktu),
+        "throughput_mb_s": ukuran_byte / (1024 * 1024) / median if median > 0 else 0.0,
+        "waktu_detik": waktu,
+    }
+
+
+def daftar_angka(teks, jenis=int):
+    return [jenis(x) for x in teks.split(",") if x]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark penghitung kata serial vs parallel")
+    parser.add_argument("--ukuran", default="1,8,32", help="ukuran korpus dalam MB, dipisah koma")
+    parser.add_argument("--kosakata", default="1000,100000", help="ukuran kosakata, dipisah koma")
+    parser.add_argument("--nproc", default="1,2,4,8", help="jumlah proses yang diuji, dipisah koma")
+    parser.add_argument("--metode", default="memori,mmap", help="jalur parallel yang diuji: memori, mmap")
+    parser.add_argument("--backend", default="proses", help="executor yang diuji: proses, thread, serial")
+    parser.add_argument("--gabung", default="otomatis",
+                        help="cara menggabungkan hasil worker yang diuji: otomatis, serial, pohon")
+    parser.add_argument("--mode-token", default="ascii", help="mode tokenisasi yang diuji: ascii, unicode")
+    parser.add_argument("--non-ascii", type=float, default=0.0,
+                        help="proporsi kata beraksen di kosakata korpus sintetis")
+    parser.add_argument("--ulang", type=int, default=5, help="jumlah pengukuran per konfigurasi")
+    parser.add_argument("--pemanasan", type=int, default=1, help="jumlah run pemanasan yang tidak diukur")
+    parser.add_argument("--output", default="hasil_benchmark.json", help="file hasil (JSON)")
+    args = parser.parse_args()
+
+    hasil = {
+        "waktu_mulai": datetime.now().isoformat(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "ulang": args.ulang,
+        "pemanasan": args.pemanasan,
+        "non_ascii": args.non_ascii,
+        "gil_aktif": sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True,
+        "hasil": [],
+    }
+
+    for ukuran_mb in daftar_angka(args.ukuran, float):
+        for kosakata in daftar_angka(args.kosakata):
+            teks = buat_korpus(ukuran_mb, kosakata, args.non_ascii)
+            data = teks.encode("utf-8")
+            with tempfile.NamedTemporaryFile("wb", suffix=".txt", delete=False) as f:
+                f.write(data)
+                path = f.name
+            try:
+                print(f"\nKorpus {ukuran_mb} MB, kosakata {kosakata}")
+                for mode_token in args.mode_token.split(","):
+                    serial = ringkas(ukur(lambda: penghitung_kata_serial(teks, mode_token), args.pemanasan, args.ulang),
+                                     len(data))
+                    serial.update({"ukuran_mb": ukuran_mb, "kosakata": kosakata, "mode_token": mode_token,
+                                   "metode": "serial", "nproc": 1, "speedup": 1.0, "efisiensi": 1.0})
+                    hasil["hasil"].append(serial)
+                    print(f"  [{mode_token}] serial          median {serial['median_detik']:.4f} s  "
+                          f"IQR {serial['iqr_detik']:.4f} s  {serial['throughput_mb_s']:.1f} MB/s")
+
+                    for backend in args.backend.split(","):
+                        for gabung in args.gabung.split(","):
+                            for metode in args.metode.split(","):
+                                for nproc in daftar_angka(args.nproc):
+                                    if metode == "mmap":
+                                        fungsi = lambda: penghitung_kata_parallel_file(path, nproc, gabung,
+                                                                                       mode_token=mode_token,
+                                                                                       backend=backend)
+                                    else:
+                                        fungsi = lambda: penghitung_kata_parallel(teks, nproc, gabung,
+                                                                                  mode_token=mode_token,
+                                                                                  backend=backend)
+                                    r = ringkas(ukur(fungsi, args.pemanasan, args.ulang), len(data))
+                                    speedup = serial["median_detik"] / r["median_detik"] if r["median_detik"] > 0 else 0.0
+                                    r.update({"ukuran_mb": ukuran_mb, "kosakata": kosakata, "mode_token": mode_token,
+                                              "backend": backend, "gabung": gabung, "metode": metode, "nproc": nproc,
+                                              "speedup": speedup, "efisiensi": speedup / nproc})
+                                    hasil["hasil"].append(r)
+                                    print(f"  [{mode_token}/{backend}/{gabung}] {metode:<7} nproc={nproc:<3} "
+                                          f"median {r['median_detik']:.4f} s  IQR {r['iqr_detik']:.4f} s  "
+                                          f"{r['throughput_mb_s']:.1f} MB/s  speedup {speedup:.2f}  "
+                                          f"efisiensi {speedup / nproc:.2f}")
+            finally:
+                os.remove(path)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(hasil, f, indent=2)
+    print(f"\nHasil benchmark disimpan di: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
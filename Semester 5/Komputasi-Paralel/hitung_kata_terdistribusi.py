@@ -0,0 +1,300 @@
+import argparse
+import mmap
+import multiprocessing as mp
+import os
+import queue
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from multiprocessing.connection import Client, Listener
+
+from paralelVSserial import iter_blok, print_top, proses_rentang_file
+
+ALAMAT_DEFAULT = "127.0.0.1:6000"
+
+# multiprocessing.connection meng-unpickle semua pesan dari peer, jadi authkey adalah satu-satunya
+# pembatas siapa yang boleh mengirim kode ke koordinator/node. Tidak ada nilai default: harus
+# rahasia dan sama di semua mesin, lewat --authkey atau environment variable ini
+AUTHKEY_ENV = "HITUNG_KATA_AUTHKEY"
+
+# ukuran satu rentang byte yang diberikan ke node dalam satu kali tugas
+UKURAN_RENTANG = 16 * 1024 * 1024
+
+# node yang tidak mengirim hasil dalam waktu ini dianggap mati dan tugasnya diberikan ke node lain
+BATAS_WAKTU_TUGAS = 300
+
+# rentang yang gagal sebanyak ini (error di node, node mati, atau batas waktu) membuat koordinator
+# berhenti dengan error, supaya satu rentang rusak tidak dilempar terus dari node ke node
+MAKS_PERCOBAAN = 3
+
+# koordinator berhenti kalau semua node sudah putus dan tidak ada node baru selama ini (detik)
+BATAS_WAKTU_TANPA_NODE = 30
+
+
+def parse_alamat(teks):
+    host, port = teks.rsplit(":", 1)
+    return host, int(port)
+
+
+def rencanakan_rentang(daftar_file, ukuran_rentang):
+    """Daftar tugas (id, path, mulai, berakhir) untuk file bersama yang bisa dibaca semua node."""
+    tugas = []
+    for path in daftar_file:
+        path = os.path.abspath(path)
+        if os.path.getsize(path) == 0:
+            continue
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for mulai, berakhir in iter_blok(mm, ukuran_rentang):
+                tugas.append((len(tugas), path, mulai, berakhir))
+    return tugas
+
+
+class Koordinator:
+    """Membagikan rentang byte file bersama ke node dan menggabungkan hitungan parsialnya.
+
+    Tiap koneksi node dilayani satu thread. Kalau node melaporkan error, putus, atau tidak
+    menjawab dalam batas_waktu, tugas yang sedang dipegangnya dikembalikan ke antrian untuk
+    node lain, paling banyak maks_percobaan kali per rentang. Hasil ganda dari tugas yang
+    sempat dikerjakan dua node hanya dihitung sekali.
+    """
+
+    def __init__(self, daftar_file, alamat=ALAMAT_DEFAULT, authkey=None,
+                 ukuran_rentang=UKURAN_RENTANG, batas_waktu=BATAS_WAKTU_TUGAS,
+                 maks_percobaan=MAKS_PERCOBAAN, tunggu_node=BATAS_WAKTU_TANPA_NODE):
+        if not authkey:
+            raise ValueError("authkey wajib diisi")
+        self.alamat = parse_alamat(alamat)
+        self.authkey = authkey.encode()
+        self.batas_waktu = batas_waktu
+        self.maks_percobaan = maks_percobaan
+        self.tunggu_node = tunggu_node
+        self.tugas = rencanakan_rentang(daftar_file, ukuran_rentang)
+        self.antrian = queue.Queue()
+        for t in self.tugas:
+            self.antrian.put(t)
+        self.selesai_id = set()
+        self.total = Counter()
+        self.kunci = threading.Lock()
+        self.semua_selesai = threading.Event()
+        self.dialihkan = 0
+        self.percobaan = Counter()
+        self.gagal = None
+        self.node_aktif = 0
+        # waktu node terakhir putus; None selama masih ada node atau belum ada yang terhubung
+        self.kosong_sejak = None
+        if not self.tugas:
+            self.semua_selesai.set()
+
+    def _ambil_tugas(self):
+        while not self.semua_selesai.is_set():
+            try:
+                tugas = self.antrian.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if tugas[0] not in self.selesai_id:
+                return tugas
+        return None
+
+    def _tugas_gagal(self, tugas, alasan):
+        """Mengembalikan tugas ke antrian, atau menghentikan koordinator kalau percobaannya habis."""
+        id_tugas, path, mulai, berakhir = tugas
+        with self.kunci:
+            if id_tugas in self.selesai_id or self.semua_selesai.is_set():
+                return
+            self.percobaan[id_tugas] += 1
+            if self.percobaan[id_tugas] >= self.maks_percobaan:
+                self.gagal = (f"rentang {path}:{mulai}-{berakhir} gagal {self.percobaan[id_tugas]} kali, "
+                              f"terakhir: {alasan}")
+                self.semua_selesai.set()
+                return
+            self.dialihkan += 1
+        print(f"   [!] Rentang {path}:{mulai}-{berakhir} dialihkan ke node lain ({alasan})")
+        self.antrian.put(tugas)
+
+    def _layani_node(self, conn, nama):
+        with self.kunci:
+            self.node_aktif += 1
+            self.kosong_sejak = None
+        tugas = None
+        try:
+            while True:
+                tugas = self._ambil_tugas()
+                if tugas is None:
+                    conn.send(("selesai",))
+                    return
+                conn.send(("tugas",) + tugas)
+                if not conn.poll(self.batas_waktu):
+                    raise TimeoutError(f"node {nama} tidak menjawab dalam {self.batas_waktu} detik")
+                jenis, id_tugas, isi = conn.recv()
+                if jenis == "error":
+                    # node masih hidup, hanya rentang ini yang gagal dihitung
+                    self._tugas_gagal(tugas, f"node {nama}: {isi}")
+                    tugas = None
+                    continue
+                with self.kunci:
+                    if id_tugas not in self.selesai_id:
+                        self.selesai_id.add(id_tugas)
+                        self.total.update(isi)
+                        if len(self.selesai_id) == len(self.tugas):
+                            self.semua_selesai.set()
+                tugas = None
+        except Exception as e:
+            print(f"   [!] Node {nama} gagal: {type(e).__name__} {e}")
+            if tugas is not None:
+                self._tugas_gagal(tugas, f"node {nama} gagal: {type(e).__name__}")
+        finally:
+            conn.close()
+            with self.kunci:
+                self.node_aktif -= 1
+                if self.node_aktif == 0:
+                    self.kosong_sejak = time.monotonic()
+
+    def _terima_node(self, listener):
+        while not self.semua_selesai.is_set():
+            try:
+                conn = listener.accept()
+            except (mp.AuthenticationError, EOFError) as e:
+                # peer dengan authkey salah atau putus saat handshake tidak boleh menghentikan thread ini
+                print(f"   [!] Koneksi ditolak: {type(e).__name__} {e}")
+                continue
+            except OSError:
+                return
+            try:
+                nama = f"{listener.last_accepted[0]}:{listener.last_accepted[1]}"
+            except AttributeError:
+                # jalankan() menutup listener di antara accept() dan baris ini; semua tugas sudah selesai
+                conn.close()
+                return
+            threading.Thread(target=self._layani_node, args=(conn, nama), daemon=True).start()
+
+    def jalankan(self):
+        listener = Listener(self.alamat, authkey=self.authkey)
+        print(f"Koordinator mendengarkan di {self.alamat[0]}:{self.alamat[1]} ({len(self.tugas)} rentang)")
+        threading.Thread(target=self._terima_node, args=(listener,), daemon=True).start()
+        try:
+            while not self.semua_selesai.wait(0.5):
+                with self.kunci:
+                    kosong_sejak = self.kosong_sejak
+                if kosong_sejak is not None and time.monotonic() - kosong_sejak > self.tunggu_node:
+                    with self.kunci:
+                        sisa = len(self.tugas) - len(self.selesai_id)
+                        self.gagal = (f"tidak ada node tersisa selama {self.tunggu_node} detik, "
+                                      f"{sisa} rentang belum selesai")
+                    self.semua_selesai.set()
+        finally:
+            listener.close()
+        if self.gagal is not None:
+            raise RuntimeError(self.gagal)
+        return self.total
+
+
+def _hubungkan(alamat, authkey, percobaan=50):
+    for _ in range(percobaan):
+        try:
+            return Client(parse_alamat(alamat), authkey=authkey.encode())
+        except ConnectionRefusedError:
+            # koordinator mungkin belum siap
+            time.sleep(0.1)
+    print(f"[!] Tidak bisa terhubung ke koordinator di {alamat}")
+    return None
+
+
+def jalankan_node(alamat=ALAMAT_DEFAULT, authkey=None):
+    """Node pekerja: menerima rentang dari koordinator, menghitungnya, lalu mengirim Counter-nya."""
+    if not authkey:
+        raise ValueError("authkey wajib diisi")
+    conn = _hubungkan(alamat, authkey)
+    if conn is None:
+        return
+    with conn:
+        while True:
+            try:
+                pesan = conn.recv()
+            except EOFError:
+                return
+            if pesan[0] == "selesai":
+                return
+            _, id_tugas, path, mulai, berakhir = pesan
+            try:
+                hitungan = proses_rentang_file((path, mulai, berakhir))
+            except Exception as e:
+                # laporkan ke koordinator dan tetap hidup untuk tugas berikutnya
+                conn.send(("error", id_tugas, f"{type(e).__name__}: {e}"))
+                continue
+            conn.send(("hasil", id_tugas, hitungan))
+
+
+def _node_lambat_lalu_mati(alamat, authkey):
+    # node uji: menerima satu tugas lalu mati sebelum mengirim hasil
+    conn = _hubungkan(alamat, authkey)
+    if conn is not None:
+        conn.recv()
+    os._exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hitung kata terdistribusi (koordinator + node)")
+    sub = parser.add_subparsers(dest="peran", required=True)
+
+    p_koor = sub.add_parser("koordinator", help="bagikan rentang file ke node dan gabungkan hasilnya")
+    p_node = sub.add_parser("node", help="jalankan satu node pekerja")
+    p_lokal = sub.add_parser("lokal", help="uji di satu mesin: koordinator + beberapa node localhost")
+    for p in (p_koor, p_lokal):
+        p.add_argument("file", nargs="+", help="file bersama yang bisa dibaca semua node (path sama)")
+        p.add_argument("--ukuran-rentang", type=int, default=UKURAN_RENTANG)
+        p.add_argument("--batas-waktu", type=float, default=BATAS_WAKTU_TUGAS)
+        p.add_argument("--maks-percobaan", type=int, default=MAKS_PERCOBAAN,
+                       help="berhenti dengan error kalau satu rentang gagal sebanyak ini")
+        p.add_argument("--tunggu-node", type=float, default=BATAS_WAKTU_TANPA_NODE,
+                       help="berhenti kalau selama ini (detik) tidak ada node setelah node terakhir putus")
+    for p in (p_koor, p_node, p_lokal):
+        p.add_argument("--alamat", default=ALAMAT_DEFAULT, help="host:port koordinator")
+        p.add_argument("--authkey",
+                       help=f"kunci rahasia bersama koordinator dan node (atau set {AUTHKEY_ENV}); "
+                            "mode lokal membuat kunci acak kalau tidak diisi")
+    p_lokal.add_argument("--node", type=int, default=4, help="jumlah node localhost")
+    p_lokal.add_argument("--bunuh-satu", action="store_true",
+                         help="tambah satu node yang mati di tengah tugas untuk menguji pengalihan")
+    args = parser.parse_args()
+
+    args.authkey = args.authkey or os.environ.get(AUTHKEY_ENV)
+    if not args.authkey:
+        if args.peran != "lokal":
+            parser.error(f"--authkey atau environment variable {AUTHKEY_ENV} wajib diisi")
+        # node lokal adalah anak proses ini, jadi kunci acak cukup dibagikan lewat argumen
+        args.authkey = secrets.token_hex(16)
+
+    if args.peran == "node":
+        jalankan_node(args.alamat, args.authkey)
+        return
+
+    koordinator = Koordinator(args.file, args.alamat, args.authkey, args.ukuran_rentang, args.batas_waktu,
+                              args.maks_percobaan, args.tunggu_node)
+    proses_node = []
+    if args.peran == "lokal":
+        if args.bunuh_satu:
+            proses_node.append(mp.Process(target=_node_lambat_lalu_mati, args=(args.alamat, args.authkey)))
+        proses_node += [mp.Process(target=jalankan_node, args=(args.alamat, args.authkey)) for _ in range(args.node)]
+        for p in proses_node:
+            p.start()
+
+    t0 = time.time()
+    try:
+        total = koordinator.jalankan()
+    except RuntimeError as e:
+        for p in proses_node:
+            p.terminate()
+        sys.exit(f"[!] Hitung kata dihentikan: {e}")
+    print(f"Waktu terdistribusi : {time.time() - t0:.4f} detik")
+    print(f"Rentang dialihkan   : {koordinator.dialihkan}")
+    print(f"Total kata          : {sum(total.values())}")
+    print(f"Kata unik           : {len(total)}")
+    print_top(total)
+    for p in proses_node:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,1216 @@
-
 import time
 import multiprocessing as mp
-from collections import Counter
+from multiprocessing.pool import ThreadPool
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import partial
+from array import array
+import argparse
+import glob
+import hashlib
+import heapq
+import json
+import mmap
+import os
+import pickle
+import queue
 import re
+import shutil
+import tempfile
+import threading
+import unicodedata
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy hanya dibutuhkan untuk format hasil kolom (KosakataHitungan)
+    np = None
+
+# ukuran blok yang dipindai worker dalam satu kali jalan pada mode mmap,
+# jadi pemakaian memori per worker dibatasi ukuran blok, bukan ukuran file
+UKURAN_BLOK = 64 * 1024 * 1024
+
+# batas potongan harus jatuh tepat sebelum karakter non-kata (\W). kalau dipotong di huruf,
+# satu kata terhitung dua kali; kalau dipotong di angka/underscore, "abc123" yang di serial
+# tidak dihitung malah jadi "abc". yang dipakai hanya karakter non-kata ASCII: byte ASCII
+# tidak pernah muncul di tengah karakter UTF-8 multi-byte, dan tanda diakritik gabungan
+# (non-ASCII) tidak terpisah dari hurufnya sebelum normalisasi NFKC mode unicode
+POLA_BATAS = re.compile(r'[\x00-\x2f\x3a-\x40\x5b-\x5e\x60\x7b-\x7f]')
+POLA_BATAS_BYTES = re.compile(rb'[^A-Za-z0-9_\x80-\xff]')
+
+# mulai jumlah hasil worker ini gabung="otomatis" memilih penggabungan bertingkat (pool proses saja).
+# Diukur per Counter 200 ribu kata: muat ~0,05 s, gabung ~0,1 s, simpan ~0,03 s. Serial di parent
+# ~0,15 s x (n-1), pohon ~0,23 s x log2(n) kalau tiap pasangan dapat core sendiri; impas sekitar n=8.
+# Ukur ulang di mesin target dengan benchmark_hitung_kata.py --gabung serial,pohon
+AMBANG_GABUNG_POHON = 8
+
+# ukuran potongan terkecil yang masih layak dikirim ke worker oleh MesinPenghitungKata;
+# dokumen yang lebih kecil dari ini dihitung utuh oleh satu worker
+UKURAN_POTONGAN_MIN = 256 * 1024
+
+POLA_KATA = re.compile(r'\b[a-zA-Z]+\b')
+
+# mode token "unicode": kata = deretan huruf Unicode apa saja setelah NFKC + casefold
+POLA_KATA_UNICODE = re.compile(r'[^\W\d_]+')
+
+# tokenizer byte memproses teks per blok kecil supaya daftar token sementara muat di cache
+UKURAN_BLOK_TOKEN = 1024 * 1024
+
+# parameter default mode kata teratas (SketsaKataTeratas). dengan lebar 2^16 dan kedalaman 4,
+# galat perkiraan <= 0.0042% dari total kata dengan peluang >= 98%, memori tabel tetap 2 MiB
+LEBAR_SKETSA = 1 << 16
+KEDALAMAN_SKETSA = 4
+K_KANDIDAT = 1000
+
+# lebar bit satu ID kata di dalam kunci n-gram yang dipadatkan menjadi satu int
+BIT_ID_KATA = 32
+
+# jumlah byte awal file yang disimpan sidiknya di checkpoint, untuk mendeteksi file
+# yang diganti/dirotasi sehingga hitungan harus diulang dari awal
+UKURAN_SIDIK = 64 * 1024
+
+# batas ukuran satu tugas mode korpus: file besar dipecah, file kecil dikelompokkan
+UKURAN_TUGAS_MIN = 1024 * 1024
+
+# mode pipeline: ukuran blok yang dibaca dari disk dan jumlah blok yang boleh dibaca duluan
+UKURAN_BLOK_BACA = 8 * 1024 * 1024
+BACA_DULUAN = 4
+
+
+def _buat_tabel_token():
+    # A-Z dilipat ke a-z, angka dan underscore jadi "_" (karakter kata tapi bukan huruf),
+    # byte ASCII lain jadi spasi, byte non-ASCII (bagian karakter UTF-8) dibiarkan
+    tabel = bytearray(b" " * 256)
+    for b in range(ord("a"), ord("z") + 1):
+        tabel[b] = b
+        tabel[b - 32] = b
+    for b in b"0123456789_":
+        tabel[b] = ord("_")
+    for b in range(0x80, 0x100):
+        tabel[b] = b
+    return bytes(tabel)
+
+
+TABEL_TOKEN = _buat_tabel_token()
+
+
+def hitung_token_mentah(blok, mentah):
+    """Memindai satu blok bytes dengan translate + split dan menambah hitungan token mentah.
+
+    Case dilipat saat translate, jadi tidak ada salinan lower() dari seluruh teks, dan
+    Counter.update menghitung langsung di C. Token mentah yang berisi "_" atau byte
+    non-ASCII diselesaikan belakangan di rapikan_token.
+    """
+    mentah.update(blok.translate(TABEL_TOKEN).split())
+    return mentah
+
+
+def rapikan_token(mentah, total=None):
+    """Mengubah hitungan token mentah (bytes) menjadi Counter kata yang sama persis dengan regex serial."""
+    if total is None:
+        total = Counter()
+    for token, jumlah in mentah.items():
+        if token.isascii():
+            # token ASCII yang mengandung angka/underscore tidak lolos \b[a-zA-Z]+\b
+            if b"_" not in token:
+                total[token.decode("ascii")] += jumlah
+        else:
+            # token yang menempel karakter non-ASCII dicek ulang dengan regex asli,
+            # cukup sekali per token unik, bukan per kemunculan. Byte UTF-8 rusak jadi U+FFFD,
+            # yang bukan huruf, jadi berlaku sebagai pemisah kata alih-alih menggagalkan worker
+            for kata in POLA_KATA.findall(token.decode("utf-8", "replace").lower()):
+                total[kata] += jumlah
+    return total
+
+
+def hitung_kata_bytes(data, mulai=0, berakhir=None, mentah=None):
+    """Menghitung token mentah data[mulai:berakhir] (bytes atau mmap) per blok UKURAN_BLOK_TOKEN."""
+    if mentah is None:
+        mentah = Counter()
+    for posisi, batas in iter_blok(data, UKURAN_BLOK_TOKEN, mulai, berakhir):
+        hitung_token_mentah(data[posisi:batas], mentah)
+    return mentah
+
+
+def hitung_kata_teks(teks, mentah=None, mulai=0, berakhir=None):
+    """Sama dengan hitung_kata_bytes, tapi untuk str: tiap blok di-encode ke UTF-8 dulu."""
+    if mentah is None:
+        mentah = Counter()
+    for posisi, batas in iter_blok(teks, UKURAN_BLOK_TOKEN, mulai, berakhir):
+        hitung_token_mentah(teks[posisi:batas].encode("utf-8", "surrogatepass"), mentah)
+    return mentah
+
+
+def _buat_tabel_huruf():
+    # A-Z dilipat ke a-z, byte ASCII non-huruf jadi spasi, byte non-ASCII dibiarkan.
+    # untuk bagian ASCII, NFKC tidak mengubah apa pun dan casefold sama dengan lower
+    tabel = bytearray(b" " * 256)
+    for b in range(ord("a"), ord("z") + 1):
+        tabel[b] = b
+        tabel[b - 32] = b
+    for b in range(0x80, 0x100):
+        tabel[b] = b
+    return bytes(tabel)
+
+
+TABEL_HURUF = _buat_tabel_huruf()
+
+
+def hitung_kata_unicode(data, mulai=0, berakhir=None, total=None):
+    """Tokenisasi mode unicode (NFKC + casefold, semua huruf Unicode) untuk str, bytes, atau mmap.
+
+    Jalur cepatnya sama dengan mode ascii: translate + split per blok. Hanya token unik
+    yang berisi byte non-ASCII yang dinormalisasi dan dipindai dengan regex Unicode,
+    jadi blok ASCII murni tidak pernah menyentuh unicodedata. Byte UTF-8 yang rusak
+    menjadi U+FFFD dan berlaku sebagai pemisah kata.
+    """
+    if total is None:
+        total = Counter()
+    mentah = Counter()
+    for posisi, batas in iter_blok(data, UKURAN_BLOK_TOKEN, mulai, berakhir):
+        blok = data[posisi:batas]
+        if isinstance(blok, str):
+            blok = blok.encode("utf-8", "surrogatepass")
+        mentah.update(blok.translate(TABEL_HURUF).split())
+    for token, jumlah in mentah.items():
+        if token.isascii():
+            total[token.decode("ascii")] += jumlah
+        else:
+            teks = unicodedata.normalize("NFKC", token.decode("utf-8", "replace")).casefold()
+            for kata in POLA_KATA_UNICODE.findall(teks):
+                total[kata] += jumlah
+    return total
+
+
+def proses_mengambil_potongan_teks(potongan_teks, mode_token="ascii"):
+    if mode_token == "unicode":
+        return hitung_kata_unicode(potongan_teks)
+    return rapikan_token(hitung_kata_teks(potongan_teks))
+
+
+def penghitung_kata_serial(teks, mode_token="ascii"):
+    return proses_mengambil_potongan_teks(teks, mode_token)
+
+
+def proses_rentang_teks(tugas, mode_token="ascii"):
+    """Worker backend thread/serial: menghitung teks[mulai:berakhir] tanpa menyalin potongannya."""
+    teks, mulai, berakhir = tugas
+    if mode_token == "unicode":
+        return hitung_kata_unicode(teks, mulai, berakhir)
+    return rapikan_token(hitung_kata_teks(teks, mulai=mulai, berakhir=berakhir))
+
+
+class _PoolSerial:
+    """Pengganti Pool yang menjalankan semua tugas di thread pemanggil (backend "serial")."""
+
+    class _Hasil:
+        def __init__(self, nilai):
+            self.nilai = nilai
+
+        def get(self, timeout=None):
+            return self.nilai
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def map(self, fungsi, data, chunksize=None):
+        return [fungsi(x) for x in data]
+
+    def imap(self, fungsi, data, chunksize=1):
+        return map(fungsi, data)
+
+    imap_unordered = imap
+
+    def apply(self, fungsi, args=()):
+        return fungsi(*args)
+
+    def apply_async(self, fungsi, args=()):
+        return self._Hasil(fungsi(*args))
+
+    def close(self):
+        pass
+
+    def join(self):
+        pass
+
+    def terminate(self):
+        pass
+
+
+def buat_pool(backend, nproc):
+    """Membuat executor dengan API Pool: "proses" (multiprocessing), "thread", atau "serial".
+
+    Backend thread tidak membayar start proses dan pickling, dan worker bisa membaca teks
+    sumber yang sama. Di CPython biasa GIL membatasi skalanya; di build free-threaded
+    (python3.13t ke atas) thread berjalan parallel sungguhan.
+    """
+    if backend == "proses":
+        return mp.Pool(nproc)
+    if backend == "thread":
+        return ThreadPool(nproc)
+    if backend == "serial":
+        return _PoolSerial()
+    raise ValueError(f"Backend tidak dikenal: {backend}")
+
+
+def _geser_ke_batas_kata(data, posisi, batas):
+    """Memajukan posisi sampai karakter non-kata berikutnya (str, bytes, atau mmap)."""
+    pola = POLA_BATAS if isinstance(data, str) else POLA_BATAS_BYTES
+    m = pola.search(data, posisi, batas)
+    return m.start() if m else batas
 
-def proses_mengambil_potongan_teks(potongan_teks):
-    kata = re.findall(r'\b[a-zA-Z]+\b', potongan_teks.lower())
-    return Counter(kata)
 
+def iter_blok(data, ukuran, mulai=0, berakhir=None):
+    """Menghasilkan rentang (posisi, batas) berukuran sekitar ukuran yang tidak memotong kata."""
+    if berakhir is None:
+        berakhir = len(data)
+    posisi = mulai
+    while posisi < berakhir:
+        batas = _geser_ke_batas_kata(data, min(posisi + ukuran, berakhir), berakhir)
+        yield posisi, batas
+        posisi = batas
 
-def penghitung_kata_serial(teks):
-    kata = re.findall(r'\b[a-zA-Z]+\b', teks.lower())
-    return Counter(kata)
 
+def rencanakan_potongan(data, nproc, mulai=0, berakhir=None):
+    """Membagi data[mulai:berakhir] menjadi maksimal nproc rentang yang tidak memotong kata."""
+    if berakhir is None:
+        berakhir = len(data)
+    awal, ukuran = mulai, berakhir - mulai
+    rentang = []
+    for i in range(1, nproc + 1):
+        if i == nproc:
+            batas = berakhir
+        else:
+            batas = _geser_ke_batas_kata(data, max(mulai, awal + i * ukuran // nproc), berakhir)
+        if batas > mulai:
+            rentang.append((mulai, batas))
+        mulai = batas
+    return rentang
 
-def penghitung_kata_parallel(teks, nproc=4):
-    size = len(teks) // nproc
-    potongan_teks = []
 
-    for i in range(nproc):
-        mulai = i * size 
-        berakhir = len(teks) if i == nproc - 1 else (i + 1) * size
-        potongan_teks.append(teks[mulai:berakhir])
+class SketsaKataTeratas:
+    """Perkiraan kata terbanyak dengan memori tetap: Count-Min Sketch + himpunan kandidat.
+
+    Perkiraan jumlah sebuah kata tidak pernah lebih kecil dari jumlah sebenarnya, dan
+    dengan peluang minimal 1 - e^-kedalaman kelebihannya tidak sampai (e / lebar) * total.
+    Kandidat disimpan paling banyak k kata; seperti Space-Saving, kata baru yang
+    perkiraannya lebih besar menggusur kandidat terkecil. Sketsa dari worker lain bisa
+    digabung lewat update() selama lebar dan kedalamannya sama.
+    """
+
+    def __init__(self, k=K_KANDIDAT, lebar=LEBAR_SKETSA, kedalaman=KEDALAMAN_SKETSA):
+        if k < 1:
+            raise ValueError(f"Jumlah kandidat k minimal 1, bukan {k}")
+        self.k = k
+        self.lebar = lebar
+        self.kedalaman = kedalaman
+        self.tabel = [array("q", bytes(8 * lebar)) for _ in range(kedalaman)]
+        self.total = 0
+        self.kandidat = {}
+        # min-heap (perkiraan, kata); entri lama dibiarkan dan dilewati saat dibaca
+        self._heap = []
+
+    def __len__(self):
+        return len(self.kandidat)
+
+    def _indeks(self, kata):
+        # hash stabil antar proses (hash() bawaan Python diacak per proses),
+        # lalu double hashing untuk mendapat satu kolom per baris
+        h = int.from_bytes(hashlib.blake2b(kata.encode("utf-8", "surrogatepass"), digest_size=16).digest(), "little")
+        h1, h2 = h & 0xFFFFFFFFFFFFFFFF, (h >> 64) | 1
+        return [(h1 + i * h2) % self.lebar for i in range(self.kedalaman)]
+
+    def perkiraan(self, kata):
+        return min(baris[j] for baris, j in zip(self.tabel, self._indeks(kata)))
+
+    def tambah(self, hitungan):
+        """Memasukkan Counter kata (biasanya hasil satu blok) ke sketsa."""
+        for kata, jumlah in hitungan.items():
+            perkiraan = None
+            for baris, j in zip(self.tabel, self._indeks(kata)):
+                baris[j] += jumlah
+                if perkiraan is None or baris[j] < perkiraan:
+                    perkiraan = baris[j]
+            self.total += jumlah
+            self._catat_kandidat(kata, perkiraan)
+
+    def _catat_kandidat(self, kata, perkiraan):
+        if kata not in self.kandidat and len(self.kandidat) >= self.k:
+            while self._heap[0][0] != self.kandidat.get(self._heap[0][1]):
+                heapq.heappop(self._heap)
+            if perkiraan <= self._heap[0][0]:
+                return
+            del self.kandidat[heapq.heappop(self._heap)[1]]
+        self.kandidat[kata] = perkiraan
+        heapq.heappush(self._heap, (perkiraan, kata))
+        if len(self._heap) > 4 * self.k:
+            self._susun_heap()
+
+    def _susun_heap(self):
+        self._heap = [(v, w) for w, v in self.kandidat.items()]
+        heapq.heapify(self._heap)
+
+    def update(self, lain):
+        """Menggabungkan sketsa lain ke sketsa ini (nama sama dengan Counter.update)."""
+        if (self.lebar, self.kedalaman) != (lain.lebar, lain.kedalaman):
+            raise ValueError("Sketsa dengan lebar/kedalaman berbeda tidak bisa digabung")
+        for a, b in zip(self.tabel, lain.tabel):
+            for j, v in enumerate(b):
+                if v:
+                    a[j] += v
+        self.total += lain.total
+        semua = set(self.kandidat) | set(lain.kandidat)
+        perkiraan = [(kata, self.perkiraan(kata)) for kata in semua]
+        self.kandidat = dict(heapq.nlargest(self.k, perkiraan, key=lambda x: x[1]))
+        self._susun_heap()
+
+    def most_common(self, n=None):
+        data = sorted(self.kandidat.items(), key=lambda x: x[1], reverse=True)
+        return data if n is None else data[:n]
+
+
+def proses_potongan_teratas(tugas):
+    """Worker mode kata teratas: hitungan tiap blok langsung dimasukkan ke sketsa lalu dibuang."""
+    potongan_teks, k, lebar, kedalaman = tugas
+    sketsa = SketsaKataTeratas(k, lebar, kedalaman)
+    for posisi, batas in iter_blok(potongan_teks, UKURAN_BLOK_TOKEN):
+        sketsa.tambah(rapikan_token(hitung_kata_teks(potongan_teks[posisi:batas])))
+    return sketsa
+
+
+def penghitung_kata_teratas_serial(teks, k=K_KANDIDAT, lebar=LEBAR_SKETSA, kedalaman=KEDALAMAN_SKETSA):
+    return proses_potongan_teratas((teks, k, lebar, kedalaman))
+
+
+def penghitung_kata_teratas_parallel(teks, nproc=4, k=K_KANDIDAT, lebar=LEBAR_SKETSA,
+                                     kedalaman=KEDALAMAN_SKETSA, gabung="otomatis"):
+    tugas = [(teks[mulai:berakhir], k, lebar, kedalaman) for mulai, berakhir in rencanakan_potongan(teks, nproc)]
+    if not tugas:
+        return SketsaKataTeratas(k, lebar, kedalaman)
     with mp.Pool(nproc) as p:
-        results = p.map(proses_mengambil_potongan_teks, potongan_teks)
-    total = Counter()
-    for r in results:
+        return map_gabung(p, proses_potongan_teratas, tugas, gabung)
+
+
+class HasilNgram:
+    """Hitungan n-gram atau pasangan ko-okurensi dengan kunci int yang dipadatkan.
+
+    Setiap kata diberi ID (urutan di kosakata) dan satu n-gram disimpan sebagai satu int
+    berisi n ID selebar BIT_ID_KATA, jauh lebih kecil dari tuple string. Untuk ko-okurensi
+    (jendela tidak None) kuncinya pasangan kata yang diurutkan alfabetis.
+    """
+
+    def __init__(self, n=2, jendela=None):
+        self.n = 2 if jendela else n
+        self.jendela = jendela
+        self.kosakata = []
+        self.hitungan = Counter()
+        self._indeks = None
+
+    def __len__(self):
+        return len(self.hitungan)
+
+    def __getstate__(self):
+        # indeks kata -> ID bisa dibangun ulang dari kosakata, tidak perlu ikut dikirim antar proses
+        state = self.__dict__.copy()
+        state["_indeks"] = None
+        return state
+
+    def values(self):
+        return self.hitungan.values()
+
+    def id_kata(self, kata):
+        if self._indeks is None:
+            self._indeks = {w: i for i, w in enumerate(self.kosakata)}
+        i = self._indeks.get(kata)
+        if i is None:
+            i = self._indeks[kata] = len(self.kosakata)
+            self.kosakata.append(kata)
+        return i
+
+    def pak(self, ids):
+        if self.jendela and self.kosakata[ids[0]] > self.kosakata[ids[1]]:
+            ids = (ids[1], ids[0])
+        kunci = 0
+        for k, i in enumerate(ids):
+            kunci |= i << (BIT_ID_KATA * k)
+        return kunci
+
+    def buka(self, kunci):
+        topeng = (1 << BIT_ID_KATA) - 1
+        return tuple((kunci >> (BIT_ID_KATA * k)) & topeng for k in range(self.n))
+
+    def tambah_tuple(self, hitungan_tuple):
+        for ids, jumlah in hitungan_tuple.items():
+            self.hitungan[self.pak(ids)] += jumlah
+
+    def pangkas(self, min_count):
+        """Membuang kunci dengan hitungan di bawah min_count (dipakai per worker untuk menghemat memori)."""
+        if min_count > 1:
+            self.hitungan = Counter({k: c for k, c in self.hitungan.items() if c >= min_count})
+
+    def update(self, lain):
+        """Menggabungkan hasil lain; ID kata lain dipetakan ulang ke kosakata ini."""
+        peta = [self.id_kata(w) for w in lain.kosakata]
+        for kunci, jumlah in lain.hitungan.items():
+            self.hitungan[self.pak(tuple(peta[i] for i in lain.buka(kunci)))] += jumlah
+
+    def most_common(self, n=None):
+        return [(" ".join(self.kosakata[i] for i in self.buka(kunci)), jumlah)
+                for kunci, jumlah in self.hitungan.most_common(n)]
+
+
+def _hitung_awal(ids, lo, hi, hasil):
+    """Menghitung n-gram / pasangan yang kata pertamanya di ids[lo:hi] dan konteksnya tersedia."""
+    if hasil.jendela:
+        sementara = Counter()
+        for d in range(1, hasil.jendela + 1):
+            hi_d = min(hi, len(ids) - d)
+            if hi_d > lo:
+                sementara.update(zip(ids[lo:hi_d], ids[lo + d:hi_d + d]))
+    else:
+        hi_n = min(hi, len(ids) - hasil.n + 1)
+        if hi_n <= lo:
+            return
+        sementara = Counter(zip(*(ids[lo + k:hi_n + k] for k in range(hasil.n))))
+    hasil.tambah_tuple(sementara)
+
+
+def _konteks_dibutuhkan(n, jendela):
+    return jendela if jendela else n - 1
+
+
+def proses_potongan_ngram(tugas):
+    """Worker n-gram: menghitung n-gram yang dimulai di potongan ini.
+
+    lanjutan_teks adalah awal potongan berikutnya, cukup untuk melengkapi n-gram yang
+    menyeberang batas potongan, jadi tiap n-gram dihitung tepat sekali oleh satu worker.
+    """
+    potongan_teks, lanjutan_teks, n, jendela, min_count = tugas
+    hasil = HasilNgram(n, jendela)
+    butuh = _konteks_dibutuhkan(n, jendela)
+    ekor = []
+    for posisi, batas in iter_blok(potongan_teks, UKURAN_BLOK_TOKEN):
+        ids = ekor + [hasil.id_kata(w) for w in POLA_KATA.findall(potongan_teks[posisi:batas].lower())]
+        # kata di ekor belum punya konteks lengkap, jadi dihitung di blok berikutnya
+        siap = max(0, len(ids) - butuh)
+        _hitung_awal(ids, 0, siap, hasil)
+        ekor = ids[siap:]
+    lanjutan = [hasil.id_kata(w) for w in POLA_KATA.findall(lanjutan_teks.lower())[:butuh]]
+    _hitung_awal(ekor + lanjutan, 0, len(ekor), hasil)
+    hasil.pangkas(min_count)
+    return hasil
+
+
+def _ambil_lanjutan(teks, berakhir, butuh):
+    """Potongan teks setelah posisi berakhir yang memuat paling sedikit butuh kata."""
+    lebar = 256
+    while True:
+        batas = _geser_ke_batas_kata(teks, min(berakhir + lebar, len(teks)), len(teks))
+        if batas == len(teks) or len(POLA_KATA.findall(teks[berakhir:batas].lower())) >= butuh:
+            return teks[berakhir:batas]
+        lebar *= 4
+
+
+def penghitung_ngram_serial(teks, n=2, jendela=None):
+    return proses_potongan_ngram((teks, "", n, jendela, 1))
+
+
+def penghitung_ngram_parallel(teks, n=2, nproc=4, jendela=None, min_count=1, gabung="otomatis"):
+    """Menghitung n-gram (atau ko-okurensi dalam jendela kata) secara parallel.
+
+    min_count > 1 memangkas kunci langka di tiap worker sebelum dikirim; hitungan kunci
+    yang tersebar tipis di banyak potongan bisa ikut terbuang.
+    """
+    butuh = _konteks_dibutuhkan(n, jendela)
+    tugas = [(teks[mulai:berakhir], _ambil_lanjutan(teks, berakhir, butuh), n, jendela, min_count)
+             for mulai, berakhir in rencanakan_potongan(teks, nproc)]
+    if not tugas:
+        return HasilNgram(n, jendela)
+    with mp.Pool(nproc) as p:
+        return map_gabung(p, proses_potongan_ngram, tugas, gabung)
+
+
+class KosakataHitungan:
+    """Hasil hitung kata berbentuk kolom: daftar kata (ID = posisi) dan array numpy hitungannya.
+
+    Saat dikirim antar proses, kata dikemas jadi satu string dipisah baris baru dan
+    hitungan sebagai satu array int64, jauh lebih murah di-pickle daripada dict str -> int.
+    """
+
+    def __init__(self, kata=None, hitungan=None):
+        if np is None:
+            raise ImportError("Format hasil kolom membutuhkan numpy (pip install numpy)")
+        self.kata = list(kata) if kata is not None else []
+        self.hitungan = np.asarray(hitungan if hitungan is not None else [], dtype=np.int64)
+        self._indeks = None
+
+    @classmethod
+    def dari_counter(cls, counter):
+        return cls(counter.keys(), np.fromiter(counter.values(), dtype=np.int64, count=len(counter)))
+
+    def __len__(self):
+        return len(self.kata)
+
+    def __getstate__(self):
+        # token tidak pernah mengandung spasi/baris baru, jadi aman digabung dengan "\n"
+        return {"kata": "\n".join(self.kata), "hitungan": self.hitungan}
+
+    def __setstate__(self, state):
+        self.kata = state["kata"].split("\n") if state["kata"] else []
+        self.hitungan = state["hitungan"]
+        self._indeks = None
+
+    @property
+    def total(self):
+        return int(self.hitungan.sum())
+
+    def values(self):
+        return self.hitungan
+
+    def update(self, lain):
+        """Menggabungkan hasil lain; kata baru ditambahkan di akhir kosakata."""
+        if self._indeks is None:
+            self._indeks = {w: i for i, w in enumerate(self.kata)}
+        ids = np.empty(len(lain.kata), dtype=np.int64)
+        for j, w in enumerate(lain.kata):
+            i = self._indeks.get(w)
+            if i is None:
+                i = self._indeks[w] = len(self.kata)
+                self.kata.append(w)
+            ids[j] = i
+        if len(self.kata) > len(self.hitungan):
+            self.hitungan = np.concatenate([self.hitungan, np.zeros(len(self.kata) - len(self.hitungan), np.int64)])
+        # ID dalam satu hasil unik, jadi penjumlahan lewat indeks langsung aman
+        self.hitungan[ids] += lain.hitungan
+
+    def urutan_teratas(self, n=None):
+        if n is None or n >= len(self.hitungan):
+            return np.argsort(-self.hitungan, kind="stable")
+        calon = np.argpartition(-self.hitungan, n)[:n]
+        return calon[np.argsort(-self.hitungan[calon], kind="stable")]
+
+    def most_common(self, n=None):
+        return [(self.kata[i], int(self.hitungan[i])) for i in self.urutan_teratas(n)]
+
+    def simpan(self, path):
+        """Menyimpan hasil terurut dari hitungan terbesar.
+
+        path berakhiran .parquet ditulis sebagai tabel Parquet (butuh pyarrow); selain itu
+        ditulis tiga file: path + "_kata.npy" (byte UTF-8 semua kata disambung, uint8),
+        path + "_offset.npy" (int64, kata ke-i = byte offset[i]:offset[i+1]) dan
+        path + "_hitungan.npy". Kata tidak disimpan sebagai array string lebar tetap karena
+        satu kata yang sangat panjang akan memperbesar ukuran setiap entri. Top-K bisa dibaca
+        dengan np.load(..., mmap_mode="r") tanpa membangun dict.
+        """
+        urutan = self.urutan_teratas()
+        kata = [self.kata[i] for i in urutan]
+        hitungan = self.hitungan[urutan]
+        if path.endswith(".parquet"):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(pa.table({"kata": kata, "jumlah": hitungan}), path)
+            return [path]
+        kata_bytes = [w.encode("utf-8") for w in kata]
+        offset = np.zeros(len(kata_bytes) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in kata_bytes], out=offset[1:])
+        np.save(path + "_kata.npy", np.frombuffer(b"".join(kata_bytes), dtype=np.uint8))
+        np.save(path + "_offset.npy", offset)
+        np.save(path + "_hitungan.npy", hitungan)
+        return [path + "_kata.npy", path + "_offset.npy", path + "_hitungan.npy"]
+
+    @classmethod
+    def muat(cls, path, k=None):
+        """Memuat k baris teratas dari file yang ditulis simpan()."""
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            tabel = pq.read_table(path)
+            if k is not None:
+                tabel = tabel.slice(0, k)
+            return cls(tabel.column("kata").to_pylist(), tabel.column("jumlah").to_numpy())
+        offset = np.load(path + "_offset.npy", mmap_mode="r")
+        offset = np.array(offset if k is None else offset[:k + 1])
+        data = np.load(path + "_kata.npy", mmap_mode="r")[offset[0]:offset[-1]].tobytes()
+        offset -= offset[0]
+        kata = [data[offset[i]:offset[i + 1]].decode("utf-8") for i in range(len(offset) - 1)]
+        hitungan = np.load(path + "_hitungan.npy", mmap_mode="r")[:len(kata)]
+        return cls(kata, np.array(hitungan))
+
+
+def _ke_kolom(fungsi, tugas):
+    """Membungkus worker biasa supaya mengembalikan KosakataHitungan, bukan Counter."""
+    return KosakataHitungan.dari_counter(fungsi(tugas))
+
+
+def _gabung_dua(pasangan):
+    """Menggabungkan dua Counter; yang kecil dimasukkan ke yang besar."""
+    a, b = pasangan
+    if len(a) < len(b):
+        a, b = b, a
+    a.update(b)
+    return a
+
+
+def gabung_hasil(results):
+    """Menggabungkan hasil worker secara serial di parent."""
+    # hasil pertama dipakai sebagai wadah, jadi fungsi ini juga berlaku untuk SketsaKataTeratas
+    total = results[0] if results else Counter()
+    for r in results[1:]:
         total.update(r)
     return total
 
 
+def _simpan_sementara(hasil, folder):
+    fd, path = tempfile.mkstemp(suffix=".pkl", dir=folder)
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(hasil, f, pickle.HIGHEST_PROTOCOL)
+    return path
+
+
+def _muat_sementara(path):
+    with open(path, "rb") as f:
+        hasil = pickle.load(f)
+    os.remove(path)
+    return hasil
+
+
+def _hasil_ke_file(worker, folder, tugas):
+    """Menjalankan worker lalu menyimpan hasilnya ke file; yang dikirim ke parent hanya path-nya."""
+    return _simpan_sementara(worker(tugas), folder)
+
+
+def _gabung_dua_file(pasangan):
+    a, b = pasangan
+    return _simpan_sementara(_gabung_dua((_muat_sementara(a), _muat_sementara(b))), os.path.dirname(a))
+
+
+def _gabung_pohon(p, paths):
+    """Penggabungan bertingkat: tiap putaran worker menggabungkan pasangan file hasil secara parallel.
+
+    Parent hanya membagikan path, jadi Counter baru lewat parent sekali, yaitu hasil akhirnya.
+    """
+    while len(paths) > 1:
+        pasangan = [(paths[i], paths[i + 1]) for i in range(0, len(paths) - 1, 2)]
+        sisa = paths[-1:] if len(paths) % 2 else []
+        paths = p.map(_gabung_dua_file, pasangan, chunksize=1) + sisa
+    return _muat_sementara(paths[0]) if paths else Counter()
+
+
+def _pakai_pohon(p, gabung, jumlah):
+    # thread dan serial berbagi memori dengan parent, jadi tidak ada pickle yang bisa dihemat pohon
+    if not isinstance(p, mp.pool.Pool) or isinstance(p, ThreadPool):
+        return False
+    if gabung == "otomatis":
+        return jumlah >= AMBANG_GABUNG_POHON
+    return gabung == "pohon"
+
+
+def map_gabung(p, worker, tugas, gabung="otomatis", chunksize=None, urut=True):
+    """Menjalankan worker atas semua tugas di pool lalu menggabungkan hasilnya.
+
+    gabung="serial" mengirim semua hasil ke parent lalu digabung di sana. gabung="pohon" membuat
+    worker menyimpan hasilnya ke file sementara dan menggabungkan pasangan file secara bertingkat
+    (lihat _gabung_pohon). urut=False memakai imap_unordered supaya worker yang selesai duluan
+    langsung mengambil tugas berikutnya.
+    """
+    tugas = list(tugas)
+    petakan = p.map if urut else (lambda f, t, c: list(p.imap_unordered(f, t, c or 1)))
+    if not _pakai_pohon(p, gabung, len(tugas)):
+        return gabung_hasil(petakan(worker, tugas, chunksize))
+    with tempfile.TemporaryDirectory(prefix="hitung_kata_") as folder:
+        return _gabung_pohon(p, petakan(partial(_hasil_ke_file, worker, folder), tugas, chunksize))
+
+
+def penghitung_kata_parallel(teks, nproc=4, gabung="otomatis", profil=None, mode_token="ascii",
+                             format_hasil="counter", backend="proses"):
+    """format_hasil="kolom" mengembalikan KosakataHitungan (kosakata + array numpy) alih-alih Counter.
+
+    backend memilih executor (lihat buat_pool).
+    """
+    if profil is not None:
+        return _penghitung_kata_parallel_profil(teks, nproc, gabung, profil, mode_token, format_hasil, backend)
+    rentang = rencanakan_potongan(teks, nproc)
+    if backend == "proses":
+        potongan_teks = [teks[mulai:berakhir] for mulai, berakhir in rentang]
+        worker = partial(proses_mengambil_potongan_teks, mode_token=mode_token)
+    else:
+        # thread dan serial berbagi memori, jadi cukup kirim rentang atas teks yang sama
+        potongan_teks = [(teks, mulai, berakhir) for mulai, berakhir in rentang]
+        worker = partial(proses_rentang_teks, mode_token=mode_token)
+    if format_hasil == "kolom":
+        worker = partial(_ke_kolom, worker)
+    if not potongan_teks and format_hasil == "kolom":
+        return KosakataHitungan()
+    with buat_pool(backend, nproc) as p:
+        return map_gabung(p, worker, potongan_teks, gabung)
+
+
+class ProfilTahap:
+    """Catatan waktu wall/CPU per tahap penghitung_kata_parallel dan statistik tiap worker.
+
+    Waktu CPU tahap di parent diukur dengan process_time parent, jadi kerja worker
+    hanya terlihat di catatan worker.
+    """
+
+    def __init__(self):
+        self.tahap = {}
+        self.worker = []
+
+    @contextmanager
+    def ukur(self, nama):
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            catatan = self.tahap.setdefault(nama, {"wall": 0.0, "cpu": 0.0})
+            catatan["wall"] += time.perf_counter() - t0
+            catatan["cpu"] += time.process_time() - c0
+
+    def laporan(self):
+        return {"tahap": self.tahap, "worker": self.worker}
+
+    def cetak(self):
+        print("Tahap                 Wall (detik)  CPU (detik)")
+        print("-----------------------------------------------")
+        for nama, c in self.tahap.items():
+            print(f"{nama:<21} {c['wall']:>12.4f} {c['cpu']:>12.4f}")
+        print("\nWorker  PID      Wall (detik)  CPU (detik)  Byte masuk    Byte keluar")
+        print("----------------------------------------------------------------------")
+        for i, w in enumerate(self.worker):
+            print(f"{i:<7} {w['pid']:<8} {w['wall']:>12.4f} {w['cpu']:>12.4f} "
+                  f"{w['byte_masuk']:>11} {w['byte_keluar']:>14}")
+
+
+def _proses_potongan_profil(tugas, worker, format_hasil="counter", kirim=True, folder=None):
+    """Worker dengan profil: mengukur waktu tokenisasi dan ukuran hasil yang dikirim balik.
+
+    kirim=False untuk backend thread/serial: hasil tidak di-pickle, jadi byte keluar dicatat 0,
+    dan CPU diukur dengan thread_time karena process_time ikut menghitung thread worker lain.
+    Dengan folder (gabung pohon) hasil disimpan ke file dan byte keluar adalah ukuran file itu.
+    """
+    jam_cpu = time.process_time if kirim else time.thread_time
+    t0, c0 = time.perf_counter(), jam_cpu()
+    hasil = worker(tugas)
+    if format_hasil == "kolom":
+        hasil = KosakataHitungan.dari_counter(hasil)
+    catatan = {"pid": os.getpid(), "wall": time.perf_counter() - t0, "cpu": jam_cpu() - c0}
+    if folder is not None:
+        hasil = _simpan_sementara(hasil, folder)
+        catatan["byte_keluar"] = os.path.getsize(hasil)
+    else:
+        catatan["byte_keluar"] = len(pickle.dumps(hasil)) if kirim else 0
+    return hasil, catatan
+
+
+def _penghitung_kata_parallel_profil(teks, nproc, gabung, profil, mode_token, format_hasil, backend):
+    # jalur terpisah supaya penghitung_kata_parallel tanpa profil tidak membayar apa pun
+    kirim = backend == "proses"
+    with profil.ukur("potong"):
+        rentang = rencanakan_potongan(teks, nproc)
+        if kirim:
+            potongan_teks = [teks[mulai:berakhir] for mulai, berakhir in rentang]
+            worker = partial(proses_mengambil_potongan_teks, mode_token=mode_token)
+        else:
+            # sama seperti jalur tanpa profil: thread/serial cukup menerima rentang atas teks yang sama
+            potongan_teks = [(teks, mulai, berakhir) for mulai, berakhir in rentang]
+            worker = partial(proses_rentang_teks, mode_token=mode_token)
+    with profil.ukur("serialisasi_masuk"):
+        byte_masuk = [len(pickle.dumps(potongan)) if kirim else 0 for potongan in potongan_teks]
+    if not potongan_teks and format_hasil == "kolom":
+        return KosakataHitungan()
+    with profil.ukur("pool_mulai"):
+        p = buat_pool(backend, nproc)
+    folder = tempfile.mkdtemp(prefix="hitung_kata_") if _pakai_pohon(p, gabung, len(potongan_teks)) else None
+    try:
+        with profil.ukur("map"):
+            keluaran = p.map(partial(_proses_potongan_profil, worker=worker, format_hasil=format_hasil,
+                                     kirim=kirim, folder=folder), potongan_teks)
+        results = []
+        for (hasil, catatan), ukuran in zip(keluaran, byte_masuk):
+            catatan["byte_masuk"] = ukuran
+            profil.worker.append(catatan)
+            results.append(hasil)
+        with profil.ukur("gabung"):
+            total = _gabung_pohon(p, results) if folder is not None else gabung_hasil(results)
+    finally:
+        with profil.ukur("pool_tutup"):
+            p.terminate()
+            p.join()
+        if folder is not None:
+            shutil.rmtree(folder, ignore_errors=True)
+    return total
+
+
+class MesinPenghitungKata:
+    """Pool worker yang tetap hidup dan dipakai ulang untuk banyak pekerjaan hitung kata."""
+
+    def __init__(self, nproc=4, ukuran_potongan_min=UKURAN_POTONGAN_MIN, gabung="otomatis", backend="proses"):
+        self.nproc = nproc
+        self.ukuran_potongan_min = ukuran_potongan_min
+        self.gabung = gabung
+        self.pool = buat_pool(backend, nproc)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.tutup()
+
+    def tutup(self):
+        self.pool.close()
+        self.pool.join()
+
+    def jumlah_potongan(self, panjang):
+        # dokumen kecil tidak dipecah, dokumen besar dipecah sampai 4 potongan per worker
+        # supaya worker yang selesai duluan bisa mengambil potongan lain
+        return max(1, min(self.nproc * 4, panjang // self.ukuran_potongan_min))
+
+    def hitung(self, teks):
+        """Menghitung kata satu dokumen dengan granularitas potongan sesuai ukurannya."""
+        rentang = rencanakan_potongan(teks, self.jumlah_potongan(len(teks)))
+        if len(rentang) <= 1:
+            return self.pool.apply(proses_mengambil_potongan_teks, (teks,))
+        return map_gabung(self.pool, proses_mengambil_potongan_teks,
+                          [teks[mulai:berakhir] for mulai, berakhir in rentang], self.gabung, chunksize=1)
+
+    def hitung_banyak(self, dokumen):
+        """Menghitung kata banyak dokumen sekaligus, hasilnya Counter per dokumen sesuai urutan input."""
+        dokumen = list(dokumen)
+        hasil = [None] * len(dokumen)
+        kecil = [i for i, teks in enumerate(dokumen) if len(teks) < self.ukuran_potongan_min]
+        if kecil:
+            # dokumen kecil dikirim berkelompok supaya overhead per tugas tidak mendominasi
+            chunksize = max(1, len(kecil) // (self.nproc * 4))
+            counts = self.pool.imap(proses_mengambil_potongan_teks, (dokumen[i] for i in kecil), chunksize)
+            for i, c in zip(kecil, counts):
+                hasil[i] = c
+        for i, teks in enumerate(dokumen):
+            if hasil[i] is None:
+                hasil[i] = self.hitung(teks)
+        return hasil
+
+
+def _lepas_halaman(mm, mulai, berakhir):
+    """Memberi tahu kernel bahwa halaman yang sudah dipindai boleh dibuang dari RSS."""
+    if not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    mulai -= mulai % mmap.PAGESIZE
+    mm.madvise(mmap.MADV_DONTNEED, mulai, berakhir - mulai)
+
+
+def proses_rentang_file(tugas, mode_token="ascii"):
+    """Worker mode mmap: memindai rentang byte [mulai, berakhir) dari file per blok."""
+    path, mulai, berakhir = tugas
+    mentah = Counter()
+    total = Counter()
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for posisi, batas in iter_blok(mm, UKURAN_BLOK, mulai, berakhir):
+            if mode_token == "unicode":
+                hitung_kata_unicode(mm, posisi, batas, total)
+            else:
+                hitung_kata_bytes(mm, posisi, batas, mentah)
+            _lepas_halaman(mm, posisi, batas)
+    return rapikan_token(mentah, total)
+
+
+def proses_rentang_file_teratas(tugas):
+    """Worker mode mmap + kata teratas."""
+    path, mulai, berakhir, k, lebar, kedalaman = tugas
+    sketsa = SketsaKataTeratas(k, lebar, kedalaman)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for posisi, batas in iter_blok(mm, UKURAN_BLOK_TOKEN, mulai, berakhir):
+            sketsa.tambah(rapikan_token(hitung_token_mentah(mm[posisi:batas], Counter())))
+            _lepas_halaman(mm, posisi, batas)
+    return sketsa
+
+
+def bagi_rentang_file(path, nproc):
+    """Membagi file menjadi nproc rentang byte yang batasnya tidak memotong kata."""
+    if os.path.getsize(path) == 0:
+        return []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return [(path, mulai, berakhir) for mulai, berakhir in rencanakan_potongan(mm, nproc)]
+
+
+def penghitung_kata_serial_file(path, mode_token="ascii"):
+    ukuran = os.path.getsize(path)
+    if ukuran == 0:
+        return Counter()
+    return proses_rentang_file((path, 0, ukuran), mode_token)
+
+
+def penghitung_kata_parallel_file(path, nproc=4, gabung="otomatis", mode_token="ascii", format_hasil="counter",
+                                  backend="proses"):
+    # yang dikirim ke worker hanya (path, mulai, berakhir), bukan potongan teksnya
+    rentang = bagi_rentang_file(path, nproc)
+    if not rentang:
+        return KosakataHitungan() if format_hasil == "kolom" else Counter()
+    worker = partial(proses_rentang_file, mode_token=mode_token)
+    if format_hasil == "kolom":
+        worker = partial(_ke_kolom, worker)
+    with buat_pool(backend, nproc) as p:
+        return map_gabung(p, worker, rentang, gabung)
+
+
+def proses_blok_bytes(blok, mode_token="ascii"):
+    """Worker mode pipeline: menghitung kata satu blok bytes yang sudah dipotong di batas kata."""
+    if mode_token == "unicode":
+        return hitung_kata_unicode(blok)
+    return rapikan_token(hitung_kata_bytes(blok))
+
+
+def _pembaca_blok(path, antrian, berhenti, ukuran_blok):
+    """Thread pembaca: mengisi antrian dengan blok yang berakhir di batas kata, None di akhir file."""
+    try:
+        with open(path, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            sisa = b""
+            while True:
+                data = f.read(ukuran_blok)
+                blok = sisa + data if sisa else data
+                if not data:
+                    keluaran, sisa = blok, b""
+                else:
+                    # kata terakhir mungkin terpotong, jadi dibawa ke blok berikutnya
+                    potong = _batas_kata_terakhir(blok, 0, len(blok))
+                    keluaran, sisa = blok[:potong], blok[potong:]
+                for item in ([keluaran] if keluaran else []) + ([None] if not data else []):
+                    # put dengan timeout supaya thread bisa berhenti kalau konsumen gagal
+                    while not berhenti.is_set():
+                        try:
+                            antrian.put(item, timeout=0.1)
+                            break
+                        except queue.Full:
+                            pass
+                if not data or berhenti.is_set():
+                    return
+    except Exception as e:
+        antrian.put(e)
+
+
+def _ambil_blok(antrian):
+    while True:
+        blok = antrian.get()
+        if blok is None:
+            return
+        if isinstance(blok, Exception):
+            raise blok
+        yield blok
+
+
+def penghitung_kata_pipeline(path, nproc=1, ukuran_blok=UKURAN_BLOK_BACA, baca_duluan=BACA_DULUAN,
+                             mode_token="ascii"):
+    """Membaca file dan menghitung kata secara tumpang tindih.
+
+    Thread pembaca mengisi antrian berkapasitas baca_duluan blok (kalau penuh, pembaca
+    menunggu), sementara blok sebelumnya dihitung, jadi waktu total mendekati
+    max(waktu I/O, waktu CPU). Dengan nproc > 1 blok dikirim ke pool, dan jumlah blok yang
+    sedang diproses juga dibatasi supaya memori tetap sebanding dengan ukuran blok.
+    """
+    antrian = queue.Queue(maxsize=baca_duluan)
+    berhenti = threading.Event()
+    pembaca = threading.Thread(target=_pembaca_blok, args=(path, antrian, berhenti, ukuran_blok), daemon=True)
+    pembaca.start()
+    total = Counter()
+    try:
+        if nproc <= 1:
+            mentah = Counter()
+            for blok in _ambil_blok(antrian):
+                if mode_token == "unicode":
+                    hitung_kata_unicode(blok, total=total)
+                else:
+                    hitung_kata_bytes(blok, mentah=mentah)
+            return rapikan_token(mentah, total)
+        with mp.Pool(nproc) as p:
+            sedang_jalan = deque()
+            for blok in _ambil_blok(antrian):
+                sedang_jalan.append(p.apply_async(proses_blok_bytes, (blok, mode_token)))
+                if len(sedang_jalan) >= 2 * nproc:
+                    total.update(sedang_jalan.popleft().get())
+            while sedang_jalan:
+                total.update(sedang_jalan.popleft().get())
+        return total
+    finally:
+        berhenti.set()
+        pembaca.join()
+
+
+def _batas_kata_terakhir(mm, mulai, berakhir):
+    """Posisi karakter non-kata terakhir di mm[mulai:berakhir], atau mulai kalau tidak ada."""
+    jendela = 4096
+    while True:
+        awal = max(mulai, berakhir - jendela)
+        posisi = None
+        for m in POLA_BATAS_BYTES.finditer(mm, awal, berakhir):
+            posisi = m.start()
+        if posisi is not None:
+            return posisi
+        if awal == mulai:
+            return mulai
+        jendela *= 2
+
+
+def _sidik_file(mm, ukuran):
+    return hashlib.sha256(mm[:min(ukuran, UKURAN_SIDIK)]).hexdigest()
+
+
+def muat_checkpoint(checkpoint):
+    try:
+        with open(checkpoint, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def simpan_checkpoint(checkpoint, state):
+    # ditulis ke file sementara lalu di-rename, jadi checkpoint tidak pernah setengah jadi
+    sementara = checkpoint + ".tmp"
+    with open(sementara, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(sementara, checkpoint)
+
+
+def penghitung_kata_bertahap(path, checkpoint, nproc=1, gabung="otomatis", mode_token="ascii"):
+    """Menghitung kata file append-only mulai dari offset yang tersimpan di checkpoint.
+
+    Checkpoint menyimpan hitungan total, mode token, dan offset batas kata terakhir yang sudah
+    dihitung. Checkpoint dengan mode token lain dihitung ulang dari awal.
+    Ekor file setelah batas itu (kata yang mungkin masih ditulis) ikut dihitung untuk hasil
+    yang dikembalikan tapi tidak disimpan, jadi hasilnya selalu sama dengan hitung ulang penuh.
+    Mengembalikan (hitungan, jumlah byte baru yang dipindai).
+    """
+    ukuran = os.path.getsize(path)
+    state = muat_checkpoint(checkpoint)
+    if ukuran == 0:
+        return Counter(), 0
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        sidik_awal = _sidik_file(mm, state["offset"]) if state else None
+        # checkpoint lama tanpa mode_token selalu berasal dari mode ascii
+        if (not state or state["path"] != os.path.abspath(path) or state["offset"] > ukuran
+                or state["sidik"] != sidik_awal or state.get("mode_token", "ascii") != mode_token):
+            state = {"path": os.path.abspath(path), "offset": 0, "sidik": None, "hitungan": {}}
+        mulai = state["offset"]
+        batas = _batas_kata_terakhir(mm, mulai, ukuran)
+        rentang = [(path, a, b) for a, b in rencanakan_potongan(mm, nproc, mulai, batas)]
+        ekor = (path, batas, ukuran)
+        sidik = _sidik_file(mm, batas)
+
+    hitungan = Counter(state["hitungan"])
+    if nproc > 1 and len(rentang) > 1:
+        with mp.Pool(nproc) as p:
+            hitungan.update(map_gabung(p, partial(proses_rentang_file, mode_token=mode_token), rentang, gabung))
+    else:
+        for r in rentang:
+            hitungan.update(proses_rentang_file(r, mode_token))
+
+    # sidik dihitung dari byte yang sama dengan offset baru supaya pengecekan berikutnya cocok
+    simpan_checkpoint(checkpoint, {"path": state["path"], "offset": batas, "sidik": sidik,
+                                   "mode_token": mode_token, "hitungan": hitungan})
+    hitungan.update(proses_rentang_file(ekor, mode_token))
+    return hitungan, ukuran - mulai
+
+
+def kumpulkan_file(sumber):
+    """Daftar file dari sebuah folder (rekursif) atau pola glob, misalnya "korpus/**/*.txt"."""
+    if os.path.isdir(sumber):
+        daftar = [os.path.join(akar, nama) for akar, _, nama_file in os.walk(sumber) for nama in nama_file]
+    else:
+        daftar = [path for path in glob.glob(sumber, recursive=True) if os.path.isfile(path)]
+    return sorted(daftar)
+
+
+def rencanakan_tugas_korpus(daftar_file, ukuran_tugas):
+    """Membagi korpus menjadi tugas berisi daftar (path, mulai, berakhir) berukuran sekitar ukuran_tugas.
+
+    File besar dipecah di batas kata, file kecil dikelompokkan. Tugas diurutkan dari
+    yang terbesar supaya tugas kecil di akhir bisa mengisi worker yang menganggur.
+    """
+    tugas = []
+    kelompok, ukuran_kelompok = [], 0
+    for path in daftar_file:
+        ukuran = os.path.getsize(path)
+        if ukuran == 0:
+            continue
+        if ukuran > ukuran_tugas:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                tugas.extend([(path, a, b)] for a, b in iter_blok(mm, ukuran_tugas))
+            continue
+        if ukuran_kelompok + ukuran > ukuran_tugas:
+            tugas.append(kelompok)
+            kelompok, ukuran_kelompok = [], 0
+        kelompok.append((path, 0, ukuran))
+        ukuran_kelompok += ukuran
+    if kelompok:
+        tugas.append(kelompok)
+    tugas.sort(key=lambda t: sum(b - a for _, a, b in t), reverse=True)
+    return tugas
+
+
+def proses_tugas_korpus(tugas, mode_token="ascii"):
+    """Worker mode korpus: menghitung semua rentang file dalam satu tugas."""
+    mentah = Counter()
+    total = Counter()
+    for path, mulai, berakhir in tugas:
+        with open(path, "rb") as f:
+            f.seek(mulai)
+            data = f.read(berakhir - mulai)
+        if mode_token == "unicode":
+            hitung_kata_unicode(data, total=total)
+        else:
+            hitung_kata_bytes(data, mentah=mentah)
+    return rapikan_token(mentah, total)
+
+
+def penghitung_kata_korpus(sumber, nproc=4, ukuran_tugas=None, gabung="otomatis", mode_token="ascii"):
+    """Menghitung kata dari banyak file (folder atau glob) dengan antrian tugas dinamis."""
+    daftar_file = kumpulkan_file(sumber)
+    if ukuran_tugas is None:
+        # sekitar 8 tugas per worker, tapi tidak lebih besar dari UKURAN_BLOK agar memori worker tetap kecil
+        total = sum(os.path.getsize(path) for path in daftar_file)
+        ukuran_tugas = min(UKURAN_BLOK, max(UKURAN_TUGAS_MIN, total // (nproc * 8)))
+    tugas = rencanakan_tugas_korpus(daftar_file, ukuran_tugas)
+    if nproc <= 1:
+        total = Counter()
+        for t in tugas:
+            total.update(proses_tugas_korpus(t, mode_token))
+        return total
+    with mp.Pool(nproc) as p:
+        # chunksize=1: worker yang selesai duluan langsung mengambil tugas berikutnya dari antrian,
+        # jadi tidak ada worker yang menunggu pembagian statis
+        return map_gabung(p, partial(proses_tugas_korpus, mode_token=mode_token), tugas, gabung,
+                          chunksize=1, urut=False)
+
+
+def penghitung_kata_teratas_serial_file(path, k=K_KANDIDAT, lebar=LEBAR_SKETSA, kedalaman=KEDALAMAN_SKETSA):
+    ukuran = os.path.getsize(path)
+    if ukuran == 0:
+        return SketsaKataTeratas(k, lebar, kedalaman)
+    return proses_rentang_file_teratas((path, 0, ukuran, k, lebar, kedalaman))
+
+
+def penghitung_kata_teratas_parallel_file(path, nproc=4, k=K_KANDIDAT, lebar=LEBAR_SKETSA,
+                                          kedalaman=KEDALAMAN_SKETSA, gabung="otomatis"):
+    tugas = [r + (k, lebar, kedalaman) for r in bagi_rentang_file(path, nproc)]
+    if not tugas:
+        return SketsaKataTeratas(k, lebar, kedalaman)
+    with mp.Pool(nproc) as p:
+        return map_gabung(p, proses_rentang_file_teratas, tugas, gabung)
+
+
+def total_kata(result):
+    if isinstance(result, (SketsaKataTeratas, KosakataHitungan)):
+        return result.total
+    return sum(result.values())
+
+
+def label_unik(result):
+    # sketsa hanya menyimpan K kandidat, jadi len() bukan jumlah kata unik di teks
+    return "Kandidat" if isinstance(result, SketsaKataTeratas) else "Kata unik"
+
+
 def print_top(result):
     data = result.most_common(20)
     print("Rank  Kata                        Jumlah")
@@ -39,41 +1220,149 @@ def print_top(result):
 
 
 def main():
-    try:
-        t0 = time.time() 
-        with open("data.txt", "r", encoding="utf-8") as f:
-            teks = f.read()
-        print(f"File dibaca ({time.time() - t0:.4f} detik)")
+    parser = argparse.ArgumentParser(description="Perbandingan penghitung kata serial vs parallel")
+    parser.add_argument("file", nargs="?", default="data.txt",
+                        help="file teks yang dihitung, atau folder/pola glob untuk mode korpus")
+    parser.add_argument("--nproc", type=int, default=16, help="jumlah proses parallel")
+    parser.add_argument("--mmap", action="store_true",
+                        help="memory-map file dan kirim rentang byte ke worker (untuk file lebih besar dari RAM)")
+    parser.add_argument("--gabung", choices=["otomatis", "serial", "pohon"], default="otomatis",
+                        help="cara menggabungkan hasil worker (pohon: bertingkat di worker lewat file sementara)")
+    parser.add_argument("--teratas", type=int, metavar="K",
+                        help="mode perkiraan kata teratas dengan memori tetap (Count-Min Sketch, K kandidat)")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="hitung bertahap: lanjutkan dari offset di checkpoint dan hanya hitung data baru")
+    parser.add_argument("--ngram", type=int, metavar="N", help="hitung n-gram berukuran N, bukan kata tunggal")
+    parser.add_argument("--jendela", type=int, metavar="W",
+                        help="hitung pasangan kata yang muncul dalam jarak W kata (ko-okurensi)")
+    parser.add_argument("--min-count", type=int, default=1,
+                        help="buang n-gram dengan hitungan di bawah ini di tiap worker")
+    parser.add_argument("--mode-token", choices=["ascii", "unicode"], default="ascii",
+                        help="ascii: hanya kata a-z seperti semula; unicode: semua huruf, NFKC + casefold")
+    parser.add_argument("--simpan-kolom", metavar="PATH",
+                        help="hasil parallel dalam format kolom (numpy) lalu disimpan ke PATH_kata.npy/"
+                             "PATH_offset.npy/PATH_hitungan.npy, atau PATH.parquet")
+    parser.add_argument("--backend", choices=["proses", "thread", "serial"], default="proses",
+                        help="executor untuk jalur parallel (mode teks di memori dan mmap)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="baca file per blok di thread terpisah sambil menghitung blok sebelumnya")
+    parser.add_argument("--profil", action="store_true",
+                        help="catat waktu per tahap parallel processing (mode teks di memori)")
+    args = parser.parse_args()
+    if args.teratas is not None and args.teratas < 1:
+        parser.error("--teratas minimal 1")
 
-    except FileNotFoundError:
-        print("data.txt tidak ditemukan")
+    korpus = os.path.isdir(args.file) or glob.has_magic(args.file)
+    # tiap mode hanya mendukung sebagian opsi; opsi yang tidak didukung ditolak, bukan diabaikan diam-diam
+    pilihan_mode = [nama for nama, aktif in (("--checkpoint", args.checkpoint), ("korpus", korpus),
+                                              ("--pipeline", args.pipeline), ("--mmap", args.mmap)) if aktif]
+    if len(pilihan_mode) > 1:
+        parser.error(f"mode {' dan '.join(pilihan_mode)} tidak bisa dipakai bersamaan")
+    mode = pilihan_mode[0] if pilihan_mode else "teks di memori"
+    ngram = args.ngram is not None or args.jendela is not None
+    if ngram and args.teratas:
+        parser.error("--ngram/--jendela tidak bisa digabung dengan --teratas")
+    if ngram and mode != "teks di memori":
+        parser.error(f"--ngram/--jendela hanya didukung untuk teks di memori, bukan mode {mode}")
+    if args.teratas and mode not in ("teks di memori", "--mmap"):
+        parser.error(f"--teratas hanya didukung untuk teks di memori dan --mmap, bukan mode {mode}")
+    hitung_kata = not ngram and not args.teratas
+    if args.mode_token != "ascii" and not hitung_kata:
+        parser.error("--mode-token unicode belum didukung untuk --ngram/--jendela dan --teratas")
+    if args.simpan_kolom and not (hitung_kata and mode in ("teks di memori", "--mmap")):
+        parser.error("--simpan-kolom hanya didukung untuk hitung kata biasa di teks di memori atau --mmap")
+    if args.backend != "proses" and not (hitung_kata and mode in ("teks di memori", "--mmap")):
+        parser.error("--backend hanya didukung untuk hitung kata biasa di teks di memori atau --mmap")
+    if args.profil and not (hitung_kata and mode == "teks di memori"):
+        parser.error("--profil hanya didukung untuk hitung kata biasa di teks di memori")
+    if not korpus and not os.path.exists(args.file):
+        print(f"{args.file} tidak ditemukan")
         return
 
+    nproc = args.nproc
+    profil = ProfilTahap() if args.profil else None
+    format_hasil = "kolom" if args.simpan_kolom else "counter"
+    if args.checkpoint:
+        # ini kode untuk hitung bertahap pada file log yang terus bertambah
+        t0 = time.time()
+        hasil, byte_baru = penghitung_kata_bertahap(args.file, args.checkpoint, nproc, args.gabung,
+                                                    args.mode_token)
+        print(f"Hitung bertahap: {byte_baru} byte baru dipindai ({time.time() - t0:.4f} detik)")
+        print(f"Total kata   : {total_kata(hasil)}")
+        print(f"Kata unik    : {len(hasil)}")
+        print("\nTop 20 kata:")
+        print_top(hasil)
+        return
+
+    if korpus:
+        daftar_file = kumpulkan_file(args.file)
+        print(f"Mode korpus: {len(daftar_file)} file dari {args.file}")
+        hitung_serial = lambda: penghitung_kata_korpus(args.file, 1, mode_token=args.mode_token)
+        hitung_parallel = lambda: penghitung_kata_korpus(args.file, nproc, gabung=args.gabung,
+                                                         mode_token=args.mode_token)
+    elif args.pipeline:
+        print(f"Mode pipeline: blok {UKURAN_BLOK_BACA} byte, baca duluan {BACA_DULUAN} blok")
+        hitung_serial = lambda: penghitung_kata_pipeline(args.file, 1, mode_token=args.mode_token)
+        hitung_parallel = lambda: penghitung_kata_pipeline(args.file, nproc, mode_token=args.mode_token)
+    elif args.mmap:
+        print(f"Mode mmap: {args.file} ({os.path.getsize(args.file)} byte) tidak dibaca ke memori")
+        if args.teratas:
+            hitung_serial = lambda: penghitung_kata_teratas_serial_file(args.file, args.teratas)
+            hitung_parallel = lambda: penghitung_kata_teratas_parallel_file(args.file, nproc, args.teratas,
+                                                                            gabung=args.gabung)
+        else:
+            hitung_serial = lambda: penghitung_kata_serial_file(args.file, args.mode_token)
+            hitung_parallel = lambda: penghitung_kata_parallel_file(args.file, nproc, args.gabung, args.mode_token,
+                                                                    format_hasil, args.backend)
+    else:
+        t0 = time.time()
+        with open(args.file, "r", encoding="utf-8") as f:
+            teks = f.read()
+        print(f"File dibaca ({time.time() - t0:.4f} detik)")
+        if ngram:
+            hitung_serial = lambda: penghitung_ngram_serial(teks, args.ngram or 2, args.jendela)
+            hitung_parallel = lambda: penghitung_ngram_parallel(teks, args.ngram or 2, nproc, args.jendela,
+                                                                args.min_count, args.gabung)
+        elif args.teratas:
+            hitung_serial = lambda: penghitung_kata_teratas_serial(teks, args.teratas)
+            hitung_parallel = lambda: penghitung_kata_teratas_parallel(teks, nproc, args.teratas, gabung=args.gabung)
+        else:
+            hitung_serial = lambda: penghitung_kata_serial(teks, args.mode_token)
+            hitung_parallel = lambda: penghitung_kata_parallel(teks, nproc, args.gabung, profil, args.mode_token,
+                                                               format_hasil, args.backend)
+
     # ini kode untuk serial processing
     print("\nMenjalankan serial processing")
     t1 = time.time()
-    serial_result = penghitung_kata_serial(teks)
+    serial_result = hitung_serial()
     serial_time = time.time() - t1
     print(f"Waktu serial : {serial_time:.4f} detik")
-    print(f"Total kata   : {sum(serial_result.values())}")
-    print(f"Kata unik    : {len(serial_result)}")
+    print(f"Total kata   : {total_kata(serial_result)}")
+    print(f"{label_unik(serial_result):<13}: {len(serial_result)}")
     print("\nTop 20 kata menggunakan serial processing:")
     print_top(serial_result)
 
     # ini kode untuk parallel processing
-    nproc = 16
     print(f"\nMenjalankan parallel processing dengan ({nproc} proses)")
     t2 = time.time()
-    parallel_result = penghitung_kata_parallel(teks, nproc)
+    parallel_result = hitung_parallel()
     parallel_time = time.time() - t2
     print(f"Waktu parallel : {parallel_time:.4f} detik")
-    print(f"Total kata     : {sum(parallel_result.values())}")
-    print(f"Kata unik      : {len(parallel_result)}")
+    print(f"Total kata     : {total_kata(parallel_result)}")
+    print(f"{label_unik(parallel_result):<15}: {len(parallel_result)}")
 
     print("\nTop 20 kata menggunakan parallel processing:")
     print_top(parallel_result)
-    
-    # ini perbandingan kecepatan dan waktunya antara paraller dan serial 
+
+    if isinstance(parallel_result, KosakataHitungan):
+        for path in parallel_result.simpan(args.simpan_kolom):
+            print(f"Hasil kolom disimpan di: {path}")
+
+    if profil is not None and profil.tahap:
+        print("\nProfil tahap parallel processing:")
+        profil.cetak()
+
+    # ini perbandingan kecepatan dan waktunya antara paraller dan serial
     print("\nPerbandingan:")
     speedup = serial_time / parallel_time if parallel_time > 0 else 0
     print(f"Speedup        : {speedup:.2f}")
@@ -81,5 +1370,5 @@ def main():
 
 
 if __name__ == "__main__":
-    # mp.freeze_support() 
+    # mp.freeze_support()
     main()